@@ -1,45 +1,37 @@
 # fetch_current_table.py
-import pandas as pd
+# Atualiza data/current_table.csv (e data/remaining_matches.csv) a partir de um
+# HTML da página da temporada salvo localmente, ou de uma URL (p. ex. um
+# servidor local com a página). A extração e o cache ficam em src/ingest.py.
+# Nada roda na importação.
+#   python fetch_current_table.py --html snapshots/serie_a.html
+#   python fetch_current_table.py --url http://127.0.0.1:8000/serie_a.html
+import argparse
+from src.ingest import CACHE_DIR, FIXTURES, parse_cached, read_source, update_league
+from src.league import TABLE, REMAINING
 
 URL = "https://en.wikipedia.org/wiki/2025_Campeonato_Brasileiro_S%C3%A9rie_A"
 
-def get_league_table(url: str) -> pd.DataFrame:
-    tables = pd.read_html(url)
-    # Procura uma tabela que tenha colunas de posição e pontos
-    for t in tables:
-        cols = [str(c).lower() for c in t.columns]
-        if any("pos" in c for c in cols) and any("pts" in c or "points" in c for c in cols):
-            df = t.copy()
-            # normaliza nomes de colunas comuns
-            colmap = {}
-            for c in df.columns:
-                cl = str(c).lower()
-                if "team" in cl or "club" in cl:
-                    colmap[c] = "Team"
-                elif cl.startswith("pld") or "played" in cl:
-                    colmap[c] = "Played"
-                elif cl.startswith("pts") or "points" in cl:
-                    colmap[c] = "Points"
-            df = df.rename(columns=colmap)
-            if {"Team","Points","Played"}.issubset(df.columns):
-                return df[["Team","Points","Played"]]
-    raise RuntimeError("Tabela de liga não encontrada.")
+def main():
+    ap = argparse.ArgumentParser()
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--html", help="HTML salvo da página da temporada")
+    src.add_argument("--url", help=f"URL da página (ex.: servidor local; a original é {URL})")
+    ap.add_argument("--table", default=TABLE)
+    ap.add_argument("--remaining", default=REMAINING)
+    ap.add_argument("--fixtures", default=FIXTURES, help="calendário completo (refaz remaining se preciso)")
+    ap.add_argument("--cache-dir", default=CACHE_DIR)
+    a = ap.parse_args()
 
-df = get_league_table(URL)
+    rows, digest, hit = parse_cached(read_source(a.html, a.url), a.cache_dir)
+    print(f"Classificação: {len(rows)} times (sha256 {digest[:12]}{', do cache' if hit else ''})")
+    res = update_league(rows, a.table, a.remaining, a.fixtures)
+    if not res["table"]:
+        print("Nada mudou: CSVs mantidos.")
+        return
+    print(f"Times alterados: {', '.join(res['changed']) or '(só o formato)'}")
+    print(f"Gerado: {a.table}")
+    if res["remaining"]:
+        print(f"Gerado: {a.remaining}  (jogos que saíram: {res['played_now']})")
 
-# Opcional: padronização de nomes (ajuste apenas se seu pipeline exigir)
-name_map = {
-    "RB Bragantino": "Red Bull Bragantino",
-    "Atletico Mineiro": "Atlético Mineiro",
-    "Gremio": "Grêmio",
-    "Sao Paulo": "São Paulo",
-}
-df["Team"] = df["Team"].replace(name_map)
-
-# Garantir tipos inteiros
-df["Points"] = pd.to_numeric(df["Points"], errors="coerce").astype("Int64")
-df["Played"] = pd.to_numeric(df["Played"], errors="coerce").astype("Int64")
-
-# Salva para o projeto (UTF-8 com BOM -> Excel abre com acentos corretos)
-df.to_csv("data/current_table.csv", index=False, encoding="utf-8-sig")
-print(df.head())
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,114 @@
-import argparse
-from src.simulator import SeasonSimulator
+import argparse, json
+from pathlib import Path
+from src.simulator import SeasonSimulator, METHODS, normalize_name
+from src.scenario import parse_scenario
+from src.sweep import parse_grid
+from src.profiling import PhaseTimer
+def run(sim,a):
+    # --no-plot: só-cálculo, resultado em JSON no stdout
+    out=(lambda d:print(json.dumps(d,ensure_ascii=False))) if a.no_plot else print
+    if a.method=='all':
+        res=sim.run_all(a.sims,a.santos)
+        if a.no_plot:
+            return out(res)
+        for m,x in res.items():
+            print(m,x)
+        # comparativo dos modelos (tools/compare_models.py) a partir das matrizes recém-gravadas
+        from tools.compare_models import compare_table, format_table
+        team=normalize_name(a.santos)
+        tab=compare_table(a.outdir,team)
+        tab.to_csv(f'{a.outdir}/compare_models.csv',index_label='method')
+        print(format_table(tab,team))
+        return
+    if a.rare:
+        team,rng=a.rare.rsplit(':',1)
+        lo,hi=(int(x) for x in rng.split('-'))
+        out(sim.rare_event(a.sims,team,lo,hi,a.tilt))
+        return
+    if a.sweep:
+        tab=sim.sweep(a.sims,parse_grid(a.sweep),a.santos)
+        out(tab.to_dict(orient='records')) if a.no_plot else print(tab.to_string(index=False))
+        return
+    if a.trajectory:
+        out(sim.trajectory(a.sims,a.santos))
+        return
+    # --what-if reaproveita outcomes_{method}.npz quando veio desta mesma simulação
+    s=sim.load_outcomes(a.sims,a.santos) if a.what_if and a.target_se is None else None
+    if s is None:
+        s=sim.run(a.sims,a.santos,a.target_se,a.track_all)
+    out(s)
+    if a.what_if:
+        w=sim.what_if(parse_scenario(a.what_if),a.min_samples,santos_name=a.santos)
+        if not a.no_plot:
+            w['matrix'].to_csv(f'{a.outdir}/whatif_{a.method}.csv',index=False)
+        row=w['matrix'].set_index('Team').loc[normalize_name(a.santos)]
+        out({'scenario':a.what_if,'source':w['source'],'n_sims':w['n_sims'],
+             'santos_not_relegated_prob':float(1-row['Rebaixamento'])})
 def main():
     p=argparse.ArgumentParser()
-    p.add_argument('--method',choices=['baseline','elo','poisson'],default='baseline')
+    p.add_argument('--method',choices=['baseline','elo','poisson','all'],default='baseline',help='all: os três métodos num processo, com os mesmos sorteios')
     p.add_argument('--sims',type=int,default=50000)
     p.add_argument('--santos',type=str,default='Santos')
     p.add_argument('--seed',type=int,default=42)
     p.add_argument('--outdir',type=str,default='outputs')
+    p.add_argument('--workers',type=int,default=1)
+    p.add_argument('--shard-size',type=int,default=10000)
+    p.add_argument('--matrix-format',choices=['csv','parquet'],default='csv')
+    p.add_argument('--target-se',type=float,default=None,help='para ao atingir este erro-padrão (--sims vira teto)')
+    p.add_argument('--track-all',action='store_true',help='com --target-se, controla também as zonas de todos os times')
+    p.add_argument('--rare',type=str,default=None,help='evento raro TIME:LO-HI (ex.: "Santos:1-6"), por amostragem por importância')
+    p.add_argument('--tilt',type=float,default=None,help='θ da inclinação (padrão: escolhido por piloto)')
+    p.add_argument('--scorelines',action='store_true',help='sorteia placares e aplica os desempates oficiais (vitórias, saldo, gols pró)')
+    p.add_argument('--keep-outcomes',action='store_true',help='guarda os resultados de cada temporada (2 bits/jogo) para cenários')
+    p.add_argument('--what-if',type=str,default=None,help='cenário "Mandante x Visitante=H; ..." (H/E/A), condicionado às temporadas guardadas')
+    p.add_argument('--min-samples',type=int,default=2000,help='mínimo de temporadas compatíveis antes de re-simular o cenário')
+    p.add_argument('--cache',type=str,default=None,help='pasta do cache de resultados (ex.: .cache); reaproveita/completa execuções idênticas')
+    p.add_argument('--trajectory',action='store_true',help='distribuição de posições ao fim de cada rodada restante (CSV + mapa de calor)')
+    p.add_argument('--progress',action='store_true',help='informa o progresso a cada lote (stderr)')
+    p.add_argument('--sweep',type=str,default=None,help='sensibilidade a constantes do modelo com números aleatórios comuns, ex.: "home_adv=0:100:5" ou "gamma=300,400,500"')
+    p.add_argument('--elo-k',type=float,default=None,help='Elo dinâmico (método elo): ratings atualizados a cada jogo simulado com este fator K')
+    p.add_argument('--serve',action='store_true',help='serviço HTTP de consultas (dados e modelos em memória, cache LRU, recarga automática de data/)')
+    p.add_argument('--host',type=str,default='127.0.0.1')
+    p.add_argument('--port',type=int,default=8765)
+    p.add_argument('--socket',type=str,default=None,help='com --serve, escuta num socket Unix em vez de TCP')
+    p.add_argument('--threads',type=int,default=4,help='com --serve, threads do pool de requisições')
+    p.add_argument('--charts',choices=['none','team','all'],default='team',help='figuras: none, team (histograma do time) ou all (+ mapa de calor times × posições e painel por time)')
+    p.add_argument('--render-only',action='store_true',help='só as figuras, das contagens já gravadas (outdir/counts_{method}.npz), sem simular')
+    p.add_argument('--exact-max',type=int,default=20,help='com até este número de jogos restantes, resultado exato por enumeração em vez de Monte Carlo (0 = nunca)')
+    p.add_argument('--no-plot',action='store_true',help='só-cálculo: sem figuras nem arquivos (não importa matplotlib); JSON no stdout')
+    p.add_argument('--profile',action='store_true',help='grava tempos por fase (timing_{method}.json) e perfil cProfile (profile_{method}.prof) em --outdir')
     a=p.parse_args()
-    sim=SeasonSimulator(a.method,'data/current_table.csv','data/remaining_matches.csv','data/team_ratings.csv','data/team_strengths.csv',a.outdir,a.seed)
-    s=sim.run(a.sims,a.santos)
-    print(s)
+    if a.serve:
+        from src.server import SimService, serve
+        svc=SimService(dict(current_table_path='data/current_table.csv',remaining_matches_path='data/remaining_matches.csv',
+                            ratings_path='data/team_ratings.csv',strengths_path='data/team_strengths.csv'),
+                       a.shard_size,scorelines=a.scorelines,exact_max=a.exact_max)
+        return serve(svc,a.host,a.port,a.threads,a.socket)
+    if a.render_only:
+        from src.render import render_saved
+        for f in render_saved(a.outdir,METHODS if a.method=='all' else [a.method],a.santos,a.charts,a.workers):
+            print(f)
+        return
+    if a.matrix_format=='parquet':
+        try:
+            import pyarrow
+        except ImportError:
+            p.error('--matrix-format parquet precisa do pyarrow (pip install -r requirements.txt)')
+    if a.method=='all' and (a.rare or a.trajectory or a.sweep or a.what_if or a.target_se):
+        p.error('--method all não combina com --rare, --trajectory, --sweep, --what-if ou --target-se')
+    sim=SeasonSimulator(a.method,'data/current_table.csv','data/remaining_matches.csv','data/team_ratings.csv','data/team_strengths.csv',a.outdir,a.seed,a.shard_size,a.workers,a.matrix_format,a.scorelines,a.keep_outcomes or bool(a.what_if),a.cache,a.progress,a.no_plot,elo_k=a.elo_k,charts=a.charts,exact_max=a.exact_max)
+    if not a.profile:
+        return run(sim,a)
+    # perfil: tempo de parede por fase (PhaseTimer) + cProfile da execução inteira
+    import cProfile
+    sim.timer=PhaseTimer()
+    prof=cProfile.Profile()
+    prof.runcall(run,sim,a)
+    Path(a.outdir).mkdir(parents=True,exist_ok=True)
+    prof.dump_stats(f'{a.outdir}/profile_{a.method}.prof')
+    rep=sim.timer.report()
+    Path(f'{a.outdir}/timing_{a.method}.json').write_text(json.dumps(rep,indent=1),encoding='utf-8')
+    print({'timing':f'{a.outdir}/timing_{a.method}.json','profile':f'{a.outdir}/profile_{a.method}.prof',
+           'sims_per_s':rep['sims_per_s']})
 if __name__=='__main__':
     main()
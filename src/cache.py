@@ -0,0 +1,78 @@
+# src/cache.py
+import hashlib, json, os
+import numpy as np
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+
+# Cache de resultados endereçado por conteúdo: a chave é o hash de tudo o que
+# determina a simulação (tabela, jogos, ratings/forças, método, constantes do
+# modelo, seed, tamanho do lote). Cada chave é uma pasta com um arquivo .npy
+# por número de simulações, lidos com mmap.
+CACHE_VERSION = 3  # mude quando o motor mudar a forma de sortear (ou a chave)
+
+def _feed(h, obj):
+    if isinstance(obj, np.ndarray):
+        a = np.ascontiguousarray(obj)
+        h.update(f"nd{a.dtype.str}{a.shape}".encode()); h.update(a.tobytes())
+    elif is_dataclass(obj):
+        h.update(type(obj).__name__.encode())
+        for f in fields(obj):
+            h.update(f.name.encode()); _feed(h, getattr(obj, f.name))
+    elif isinstance(obj, dict):
+        for k in sorted(obj, key=str):
+            h.update(repr(k).encode()); _feed(h, obj[k])
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"seq{len(obj)}".encode())
+        for x in obj:
+            _feed(h, x)
+    else:
+        h.update(repr(obj).encode())
+    h.update(b"|")
+
+def cache_key(**parts):
+    """Hash sha256 (hex) das partes, independente da ordem dos argumentos."""
+    h = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    _feed(h, parts)
+    return h.hexdigest()
+
+class ResultCache:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _dir(self, key):
+        return self.root / key[:2] / key
+
+    def _save(self, path, arr):
+        tmp = path.with_name(path.name + ".tmp.npy")
+        np.save(tmp, arr)
+        os.replace(tmp, path)  # escrita atômica
+
+    def has(self, key, n, names):
+        d = self._dir(key)
+        return all((d / f"{name}_{n}.npy").exists() for name in names)
+
+    def get(self, key, n, names):
+        """{nome: array via mmap} para a execução de n simulações, ou None se faltar algo."""
+        if not self.has(key, n, names):
+            return None
+        d = self._dir(key)
+        return {name: np.load(d / f"{name}_{n}.npy", mmap_mode="r") for name in names}
+
+    def prefix(self, key, n, shard_size, names):
+        """Maior n' < n já guardado e múltiplo de shard_size (para completar a execução), ou 0."""
+        d = self._dir(key)
+        if not d.exists():
+            return 0
+        ns = [int(p.stem.split("_")[1]) for p in d.glob(f"{names[0]}_*.npy")]
+        ok = [x for x in ns if x < n and x % shard_size == 0 and self.has(key, x, names)]
+        return max(ok, default=0)
+
+    def put(self, key, n, arrays, meta=None):
+        """Grava {nome: array}; o primeiro nome é gravado por último (marca a entrada como completa)."""
+        d = self._dir(key)
+        d.mkdir(parents=True, exist_ok=True)
+        names = list(arrays)
+        for name in names[1:] + names[:1]:
+            self._save(d / f"{name}_{n}.npy", arrays[name])
+        if meta is not None:
+            (d / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=1), encoding="utf-8")
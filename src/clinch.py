@@ -0,0 +1,162 @@
+# src/clinch.py
+import numpy as np
+from collections import deque
+
+# Garantias matemáticas (sem probabilidade) a partir da tabela e dos jogos
+# restantes: melhor e pior posição possíveis de cada time, pontos que garantem
+# ficar fora do rebaixamento ("número mágico") e até quantos pontos a queda é
+# certa. É a eliminação do beisebol por fluxo máximo (Schwartz), adaptada ao
+# 3-1-0. Com vitória valendo 3 e empate 1, a pergunta exata é NP-completa; os
+# fluxos resolvem relaxações que só erram a favor da incerteza. Ao apertar
+# um time, cada jogo vale 2 pontos repartíveis (o mínimo real); ao soltar, até
+# 3. Por isso as garantias valem sempre, mas podem ser mais frouxas que o ótimo.
+# Empates em pontos (o desempate pode ser qualquer um) contam a favor na melhor
+# posição e contra na pior.
+
+def max_flow(n, edges, s, t):
+    """Fluxo máximo (Dinic) no grafo de n vértices com arestas (u, v, capacidade)."""
+    g = [[] for _ in range(n)]
+    to, cap = [], []
+    for u, v, c in edges:
+        g[u].append(len(to)); to.append(v); cap.append(c)
+        g[v].append(len(to)); to.append(u); cap.append(0)
+    flow = 0
+    while True:
+        level = [-1] * n
+        level[s] = 0
+        q = deque([s])
+        while q:
+            u = q.popleft()
+            for e in g[u]:
+                if cap[e] > 0 and level[to[e]] < 0:
+                    level[to[e]] = level[u] + 1
+                    q.append(to[e])
+        if level[t] < 0:
+            return flow
+        it = [0] * n
+        def push(u, f):
+            if u == t:
+                return f
+            while it[u] < len(g[u]):
+                e = g[u][it[u]]
+                v = to[e]
+                if cap[e] > 0 and level[v] == level[u] + 1:
+                    d = push(v, min(f, cap[e]))
+                    if d:
+                        cap[e] -= d
+                        cap[e ^ 1] += d
+                        return d
+                it[u] += 1
+            return 0
+        while True:
+            f = push(s, float("inf"))
+            if not f:
+                break
+            flow += f
+
+def _placed(home, away, teams, per_game, cap):
+    # fluxo máximo dos jogos entre 'teams' (per_game pontos por jogo) para os
+    # times, com teto cap[j] por time -> (fluxo, total, pontos possíveis por time)
+    inside = np.zeros(cap.size, dtype=bool)
+    inside[teams] = True
+    games = np.flatnonzero(inside[home] & inside[away])
+    deg = np.bincount(home[games], minlength=cap.size) + np.bincount(away[games], minlength=cap.size)
+    if games.size == 0:
+        return 0, 0, deg * per_game
+    m, T = games.size, cap.size
+    s, t = 0, 1 + m + T
+    edges = [(s, 1 + i, per_game) for i in range(m)]
+    for i, j in enumerate(games):
+        edges += [(1 + i, 1 + m + home[j], per_game), (1 + i, 1 + m + away[j], per_game)]
+    edges += [(1 + m + j, t, int(cap[j])) for j in teams if cap[j] > 0]
+    return max_flow(t + 1, edges, s, t), per_game * m, deg * per_game
+
+def _fewest(values, need):
+    # menor número de parcelas (as maiores primeiro) cuja soma chega a 'need'
+    if need <= 0:
+        return 0
+    c = np.cumsum(np.sort(np.asarray(values, dtype=np.int64))[::-1])
+    return int(np.searchsorted(c, need) + 1) if c.size and c[-1] >= need else c.size + 1
+
+def best_position(base, home, away, k, pk=None):
+    """
+    Melhor posição possível de k terminando com pk pontos (padrão: vencendo tudo);
+    os adversários de k não pontuam contra ele. Garantia: k não termina acima disso.
+    """
+    T = base.size
+    g = np.bincount(home, minlength=T) + np.bincount(away, minlength=T)
+    vs_k = np.bincount(np.r_[away[home == k], home[away == k]], minlength=T)
+    pk = base[k] + 3 * g[k] if pk is None else pk
+    top = base + 3 * (g - vs_k)  # máximo de cada um sem pontuar contra k
+    above = base > pk
+    above[k] = False
+    unsure = np.flatnonzero(~above & (top > pk) & (np.arange(T) != k))
+    cap = np.maximum(pk - base, 0)
+    flow, total, room = _placed(home, away, unsure, 2, cap)
+    # cada time liberado do teto absorve no máximo o que os seus jogos podem dar além dele
+    return 1 + int(above.sum()) + _fewest(np.maximum(room[unsure] - cap[unsure], 0), total - flow)
+
+def worst_position(base, home, away, k, pk=None):
+    """
+    Pior posição possível de k terminando com pk pontos (padrão: perdendo tudo);
+    os adversários de k levam 3 pontos contra ele. Garantia: k não termina abaixo disso.
+    """
+    T = base.size
+    g = np.bincount(home, minlength=T) + np.bincount(away, minlength=T)
+    pk = base[k] if pk is None else pk
+    can = (base + 3 * g >= pk) & (np.arange(T) != k)
+    reach = np.flatnonzero(can)
+    # pontos já garantidos no relaxamento: jogos contra k ou contra quem não alcança pk
+    free = can[home] ^ can[away]
+    pre = 3 * (np.bincount(home[free & can[home]], minlength=T) + np.bincount(away[free & can[away]], minlength=T))
+    need = np.maximum(pk - base - pre, 0)
+    flow, _, _ = _placed(home, away, reach, 3, need)
+    return 1 + reach.size - _fewest(need[reach], int(need[reach].sum()) - flow)
+
+def position_bounds(base, home, away):
+    """(melhor, pior) posição possível de cada time -> dois arrays (T,)."""
+    T = base.size
+    return (np.array([best_position(base, home, away, k) for k in range(T)]),
+            np.array([worst_position(base, home, away, k) for k in range(T)]))
+
+def magic_numbers(base, home, away, k, safe_pos):
+    """
+    (pontos que garantem posição <= safe_pos, maior número de pontos com que k
+    certamente termina abaixo de safe_pos), contados sobre os jogos restantes de
+    k. None quando nem vencendo tudo há garantia, ou quando nenhum total condena k.
+    """
+    T = base.size
+    top = 3 * int(np.bincount(home, minlength=T)[k] + np.bincount(away, minlength=T)[k])
+    safe = _first(top, lambda x: worst_position(base, home, away, k, base[k] + x) <= safe_pos)
+    alive = _first(top, lambda x: best_position(base, home, away, k, base[k] + x) <= safe_pos)
+    return safe, (top if alive is None else alive - 1 if alive > 0 else None)
+
+def _first(top, pred):
+    # menor x em 0..top com pred(x) (pred monótona: falsa, ..., verdadeira), ou None
+    if not pred(top):
+        return None
+    lo, hi = 0, top
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if pred(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+def ranking_blocks(worst, max_pairs=None):
+    """
+    Blocos de times com posições garantidamente contíguas: cortes e em que
+    exatamente e times têm pior posição <= e. Cada bloco (times, deslocamento) é
+    ordenado sozinho, por comparações par a par (engine.rank_keys). None se os
+    blocos somarem mais de max_pairs pares (padrão: 2T), quando a ordenação
+    completa sai mais barata (medido com lotes de até 50 mil temporadas).
+    """
+    T = worst.size
+    cuts = [e for e in range(1, T) if (worst <= e).sum() == e]
+    out, prev = [], 0
+    for e in cuts + [T]:
+        out.append((np.flatnonzero((worst <= e) & (worst > prev)), prev))
+        prev = e
+    pairs = sum(idx.size * (idx.size - 1) // 2 for idx, _ in out)
+    return out if pairs <= (2 * T if max_pairs is None else max_pairs) else None
@@ -13,31 +13,60 @@ BETA        = 0.10
 TAU         = 100.0
 P_MIN, P_MAX = 0.18, 0.36
 
+# Elo dinâmico (opcional): ratings atualizados a cada jogo simulado
+K_FACTOR    = 20.0
+
 def _as_lookup(ratings):
     """Converte ratings em dict {Team: Elo}, aceitando DataFrame ou dict."""
     if isinstance(ratings, dict):
         return ratings
-    try:
-        # espera colunas 'Team' e 'Elo'
-        teams = ratings["Team"].tolist()
-        elos  = ratings["Elo"].tolist()
-        return {t: float(e) for t, e in zip(teams, elos) if e == e}  # filtra NaN
-    except Exception:
+    if ratings is None:
         return {}
+    # espera colunas 'Team' e 'Elo' (sem elas é erro, não "sem ratings")
+    teams = ratings["Team"].tolist()
+    elos  = ratings["Elo"].tolist()
+    return {t: float(e) for t, e in zip(teams, elos) if e == e}  # filtra NaN
 
-def elo_probabilities(home: str, away: str, ratings):
-    lut = _as_lookup(ratings)
-    Rh = float(lut.get(home, DEFAULT_ELO))
-    Ra = float(lut.get(away, DEFAULT_ELO))
-    d  = (Rh + HOME_ADV) - Ra
+def elo_parts(Rh, Ra, home_adv=HOME_ADV, gamma=GAMMA, base_draw=BASE_DRAW,
+              dynamic_draw=None, beta=BETA, tau=TAU):
+    """
+    (e, pE) vetorizados: resultado esperado do mandante sem empate (logística
+    base-10) e probabilidade de empate. pH = (1-pE)·e e pA = (1-pE)·(1-e).
+    """
+    if dynamic_draw is None:
+        dynamic_draw = USE_DYNAMIC_DRAW
+    d = (np.asarray(Rh, dtype=float) + home_adv) - np.asarray(Ra, dtype=float)
 
-    if USE_DYNAMIC_DRAW:
-        pE = float(np.clip(BASE_DRAW + BETA*np.exp(-abs(d)/TAU), P_MIN, P_MAX))
+    if dynamic_draw:
+        pE = np.clip(base_draw + beta*np.exp(-np.abs(d)/tau), P_MIN, P_MAX)
     else:
-        pE = BASE_DRAW
+        pE = np.full_like(d, base_draw)
+    return 1.0 / (1.0 + 10.0**(-d / gamma)), pE  # logística base-10
 
+def elo_probs(Rh, Ra, home_adv=HOME_ADV, gamma=GAMMA, base_draw=BASE_DRAW,
+              dynamic_draw=None, beta=BETA, tau=TAU):
+    """
+    Versão vetorizada: recebe arrays de Elo do mandante/visitante (mesmo shape)
+    e devolve um array (..., 3) com (pH, pE, pA) por jogo.
+    """
+    pH_no, pE = elo_parts(Rh, Ra, home_adv, gamma, base_draw, dynamic_draw, beta, tau)
     dec   = 1.0 - pE
-    pH_no = 1.0 / (1.0 + 10.0**(-d / GAMMA))  # logística base-10
-    pH    = dec * pH_no
-    pA    = dec * (1.0 - pH_no)
+    return np.stack([dec * pH_no, pE, dec * (1.0 - pH_no)], axis=-1)
+
+def expected_score(Rh, Ra, home_adv=HOME_ADV, gamma=GAMMA):
+    """Resultado esperado do mandante (1=vitória, 0.5=empate) pela logística do Elo."""
+    return 1.0 / (1.0 + 10.0**(-((np.asarray(Rh, dtype=float) + home_adv) - Ra) / gamma))
+
+def elo_delta(e, o, k=K_FACTOR):
+    """
+    Variação do Elo do mandante com resultado esperado e após o resultado o
+    (0=H, 1=E, 2=A); o visitante perde o mesmo tanto. Vetorizada.
+    """
+    return k * ((2 - o) * 0.5 - e)
+
+def elo_probabilities(home: str, away: str, ratings):
+    lut = _as_lookup(ratings)
+    Rh = float(lut.get(home, DEFAULT_ELO))
+    Ra = float(lut.get(away, DEFAULT_ELO))
+    pH, pE, pA = elo_probs(Rh, Ra)
     return float(pH), float(pE), float(pA)
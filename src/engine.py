@@ -0,0 +1,312 @@
+# src/engine.py
+import numpy as np
+from dataclasses import dataclass
+from .profiling import Laps, no_laps
+
+# Pontos ganhos por (mandante, visitante) para cada resultado: 0=H, 1=E, 2=A
+HOME_PTS = np.array([3, 1, 0], dtype=np.int16)
+AWAY_PTS = np.array([0, 1, 3], dtype=np.int16)
+
+def sample_outcomes(P, n, rng):
+    """
+    Sorteia os resultados de n temporadas de uma vez: matriz (n × jogos) com
+    0=mandante, 1=empate, 2=visitante. 'P' é a tabela (jogos × 3) de (pH, pE, pA).
+    """
+    return outcomes_from_uniforms(P, rng.random((n, P.shape[0])))
+
+def outcomes_from_uniforms(P, u):
+    """Resultados (n × jogos) a partir de uniformes já sorteados u (n × jogos)."""
+    c = np.cumsum(P, axis=1)
+    return (u >= c[:, 0]).astype(np.int8) + (u >= c[:, 1])
+
+def round_batches(home, away, rounds):
+    """
+    Índices dos jogos em ordem de rodada, agrupados em lotes sem time repetido
+    (uma rodada normal é um lote; jogos adiados do mesmo time vão para o lote
+    seguinte, na ordem do arquivo).
+    """
+    out = []
+    for r in np.unique(rounds):
+        left = np.flatnonzero(rounds == r).tolist()
+        while left:
+            seen, batch, rest = set(), [], []
+            for j in left:
+                h, a = int(home[j]), int(away[j])
+                if h in seen or a in seen:
+                    rest.append(j)
+                else:
+                    batch.append(j); seen.update((h, a))
+            out.append(np.array(batch, dtype=np.intp))
+            left = rest
+    return out
+
+def sample_dynamic_outcomes(model, home, away, rounds, n, rng, P=None):
+    """
+    Como sample_outcomes, mas com Elo dinâmico: cada temporada tem seu estado de
+    ratings, atualizado por model.delta lote a lote de jogos (round_batches),
+    todas as temporadas de uma vez. Linhas de P com probabilidade 1 (resultados
+    fixados) são respeitadas.
+    """
+    # estado guardado times × temporadas: os ratings dos times de um lote são
+    # linhas contíguas (R[h]), o que barateia a leitura e a atualização
+    R = np.repeat(np.asarray(model.ratings, dtype=float)[:, None], n, axis=1)
+    o = np.empty((home.size, n), dtype=np.int8)
+    fix = None if P is None else P.max(axis=1) >= 1.0
+    for j in round_batches(home, away, rounds):
+        h, a = home[j], away[j]
+        Rh, Ra = R[h], R[a]
+        e, pE = model.rating_parts(Rh, Ra)
+        pH = (1.0 - pE) * e
+        if fix is not None and fix[j].any():
+            f = fix[j, None]
+            pH, pE = np.where(f, P[j, 0, None], pH), np.where(f, P[j, 1, None], pE)
+        u = rng.random((n, j.size)).T
+        oj = (u >= pH).astype(np.int8) + (u >= pH + pE)
+        o[j] = oj
+        d = model.delta(e, oj)
+        R[h] = Rh + d
+        R[a] = Ra - d
+    return o.T
+
+def season_points(o, home, away, base):
+    """Soma os pontos finais (n × times) via scatter-add (bincount) sobre os índices dos times."""
+    n, T = o.shape[0], base.size
+    row = np.arange(n)[:, None] * T
+    pts = np.bincount((row + home).ravel(), weights=HOME_PTS[o].ravel(), minlength=n * T)
+    pts += np.bincount((row + away).ravel(), weights=AWAY_PTS[o].ravel(), minlength=n * T)
+    return pts.reshape(n, T).astype(np.int32) + base
+
+def rank_positions(pts, rng, blocks=None):
+    """
+    Posição final (1..T) de cada time em cada temporada, ordenando todas de uma vez.
+    Empates em pontos são desfeitos ao acaso (pontos são inteiros, então somar
+    um uniforme em [0, 1) só reordena dentro do empate).
+    """
+    return rank_keys(pts + rng.random(pts.shape), blocks)
+
+def rank_keys(key, blocks=None):
+    """
+    Posições (1..T) pela chave decrescente (n × times) — ver rank_positions.
+    Com blocks (clinch.ranking_blocks: blocos de times cujas posições já
+    estão garantidas numa faixa), não há ordenação: a posição é o início do bloco
+    mais quantos times do bloco têm chave maior, e times sozinhos no bloco só
+    recebem a posição. O resultado é o mesmo da ordenação completa.
+    """
+    if blocks is not None:
+        kT = key.T
+        posT = np.empty(kT.shape, dtype=np.intp)
+        for idx, off in blocks:
+            posT[idx] = off + 1
+            for a, i in enumerate(idx):
+                for j in idx[a + 1:]:
+                    g = kT[i] > kT[j]
+                    posT[j] += g
+                    posT[i] += ~g
+        return posT.T
+    n, T = key.shape
+    order = np.argsort(-key, axis=1)
+    pos = np.empty_like(order)
+    np.put_along_axis(pos, order, np.broadcast_to(np.arange(1, T + 1), (n, T)), axis=1)
+    return pos
+
+def shard_seeds(seed, start, stop):
+    """
+    Sementes dos lotes [start, stop): o lote k usa SeedSequence(seed, spawn_key=(k,)),
+    igual ao k-ésimo filho de SeedSequence(seed).spawn(...). Assim cada lote tem
+    seu próprio fluxo, independente de quantos processos executam a simulação.
+    """
+    return [np.random.SeedSequence(seed, spawn_key=(k,)) for k in range(start, stop)]
+
+def position_counts(pos):
+    """Matriz (times × posições) de contagens a partir das posições (n × times)."""
+    T = pos.shape[1]
+    return np.bincount((np.arange(T) * T + pos - 1).ravel(), minlength=T * T).reshape(T, T)
+
+def pack_outcomes(o):
+    """(n × jogos) códigos 0..2 -> (n × ceil(jogos/4)) uint8."""
+    n, m = o.shape
+    pad = np.zeros((n, -(-m // 4) * 4), dtype=np.uint8)
+    pad[:, :m] = o
+    return (pad[:, 0::4] | (pad[:, 1::4] << 2) | (pad[:, 2::4] << 4) | (pad[:, 3::4] << 6)).astype(np.uint8)
+
+@dataclass
+class Chunk:
+    """Resumo de tamanho fixo de um lote, que alimenta os acumuladores (stats.Accumulator)."""
+    n: int
+    counts: np.ndarray              # times × posições
+    pts_mean: np.ndarray            # média dos pontos finais por time
+    pts_m2: np.ndarray              # soma dos quadrados dos desvios (para a variância)
+    packed: np.ndarray = None       # com keep: resultados empacotados (2 bits/jogo)
+    positions: np.ndarray = None    # com keep: posições finais (uint8)
+    timings: dict = None            # com timed: segundos por fase dentro do lote
+
+def chunk_summary(pts, pos, o=None):
+    mean = pts.mean(axis=0)
+    c = Chunk(pts.shape[0], position_counts(pos), mean, ((pts - mean) ** 2).sum(axis=0))
+    if o is not None:
+        c.packed, c.positions = pack_outcomes(o), pos.astype(np.uint8)
+    return c
+
+def simulate_shard(P, home, away, base, n, seed, keep=False, timed=False, dynamic=None, blocks=None):
+    """
+    Simula um lote de n temporadas e devolve seu Chunk (contagens times × posições
+    e momentos dos pontos). Com keep=True inclui os resultados de cada temporada;
+    com timed=True, o tempo de cada fase (sample/points/rank/summary). Com
+    dynamic=(modelo, rodadas), os resultados vêm de sample_dynamic_outcomes.
+    blocks: ver rank_keys.
+    """
+    lap = Laps() if timed else no_laps
+    rng = np.random.default_rng(seed)
+    o = sample_outcomes(P, n, rng) if dynamic is None else \
+        sample_dynamic_outcomes(dynamic[0], home, away, dynamic[1], n, rng, P)
+    lap("sample")
+    pts = season_points(o, home, away, base); lap("points")
+    pos = rank_positions(pts, rng, blocks); lap("rank")
+    c = chunk_summary(pts, pos, o if keep else None); lap("summary")
+    if timed:
+        c.timings = lap.d
+    return c
+
+def simulate_crn_shard(Ps, home, away, base, n, seed, timed=False, blocks=None):
+    """
+    Um lote de n temporadas para cada tabela de probabilidades em Ps (modelos × jogos × 3),
+    todas com os mesmos uniformes (números aleatórios comuns) -> lista de Chunks.
+    Cada Chunk é idêntico ao de simulate_shard com a mesma semente.
+    """
+    lap = Laps() if timed else no_laps
+    rng = np.random.default_rng(seed)
+    u = rng.random((n, Ps.shape[1]))
+    r = rng.random((n, base.size)); lap("sample")
+    out = []
+    for P in Ps:
+        pts = season_points(outcomes_from_uniforms(P, u), home, away, base); lap("points")
+        pos = rank_keys(pts + r, blocks); lap("rank")
+        out.append(chunk_summary(pts, pos)); lap("summary")
+    if timed:
+        out[0].timings = lap.d
+    return out
+
+# ---- Modo com placares e critérios oficiais de desempate -------------------
+# Ordem do Brasileirão: pontos, vitórias, saldo de gols, gols pró (depois
+# confronto direto/cartões/sorteio — aqui, sorteio). Tudo num único inteiro:
+#   pts (8 bits) | vitórias (7) | saldo+1024 (11) | gols pró (11) | sorteio (16)
+_KEY_SHIFT = {"pts": 45, "wins": 38, "gd": 27, "gf": 16}
+
+def score_alias(P, grid):
+    """
+    Tabelas de alias (Vose) por jogo para sortear placares em O(1). A grade de
+    cada jogo é reescalada para que as massas de vitória/empate/derrota batam
+    com P. Devolve (prob, alias), ambos (jogos × células).
+    """
+    m, g1, _ = grid.shape
+    i, j = np.indices((g1, g1))
+    cls = np.where(i > j, 0, np.where(i == j, 1, 2)).ravel()  # resultado de cada célula
+    J = grid.reshape(m, -1)
+    mass = np.stack([J[:, cls == c].sum(axis=1) for c in range(3)], axis=1)
+    W = J * (P / np.where(mass > 0, mass, 1.0))[:, cls]
+    K = W.shape[1]
+    q = W / W.sum(axis=1, keepdims=True) * K
+    prob = np.ones((m, K))
+    alias = np.tile(np.arange(K), (m, 1))
+    for r in range(m):
+        qr = q[r].copy()
+        small = [c for c in range(K) if qr[c] < 1.0]
+        large = [c for c in range(K) if qr[c] >= 1.0]
+        while small and large:
+            sm, lg = small.pop(), large[-1]
+            prob[r, sm], alias[r, sm] = qr[sm], lg
+            qr[lg] -= 1.0 - qr[sm]
+            if qr[lg] < 1.0:
+                small.append(large.pop())
+    return prob, alias
+
+def sample_scores(A, n, rng):
+    """Sorteia placares (n × jogos) de gols do mandante e do visitante."""
+    prob, alias = A
+    m, K = prob.shape
+    g1 = int(round(np.sqrt(K)))
+    # um uniforme por placar: parte inteira escolhe a célula, fração decide o alias
+    x = rng.random((n, m)) * K
+    cell = x.astype(np.intp)
+    flat = cell + np.arange(m) * K
+    cell = np.where(x - cell < prob.take(flat), cell, alias.take(flat))
+    return np.divmod(cell, g1)
+
+def _onehot(idx, T):
+    M = np.zeros((idx.size, T), dtype=np.float32)
+    M[np.arange(idx.size), idx] = 1.0
+    return M
+
+def season_table(hg, ag, home, away, base, stats0):
+    """
+    Pontos, vitórias, saldo e gols pró finais (cada um n × times, int32), a partir
+    da tabela atual (base, stats0 = [V, GP, GC]). As quatro somas por time saem
+    de dois produtos por matrizes one-hot (jogos × times) — exatos em float32.
+    """
+    n, m = hg.shape
+    T = base.size
+    X = np.empty((2, 4, n, m), dtype=np.float32)  # [mandante/visitante, pts/V/GP/GC]
+    X[0, 2] = hg; X[0, 3] = ag
+    X[1, 2] = ag; X[1, 3] = hg
+    np.greater(hg, ag, out=X[0, 1]); np.greater(ag, hg, out=X[1, 1])
+    eq = hg == ag
+    np.multiply(X[0, 1], 3, out=X[0, 0]); X[0, 0] += eq
+    np.multiply(X[1, 1], 3, out=X[1, 0]); X[1, 0] += eq
+    S = (X[0].reshape(4 * n, m) @ _onehot(home, T)
+         + X[1].reshape(4 * n, m) @ _onehot(away, T)).reshape(4, n, T).astype(np.int32)
+    pts = S[0] + base
+    wins = S[1] + stats0[:, 0]
+    gf = S[2] + stats0[:, 1]
+    ga = S[3] + stats0[:, 2]
+    return pts, wins, gf - ga, gf
+
+def rank_packed(pts, wins, gd, gf, rng):
+    """
+    Posição final de cada time ordenando uma única chave int64 empacotada
+    (pontos, vitórias, saldo, gols pró, sorteio) — um argsort por lote.
+    """
+    n, T = pts.shape
+    key = (np.clip(pts, 0, 255).astype(np.int64) << _KEY_SHIFT["pts"]) \
+        | (np.clip(wins, 0, 127).astype(np.int64) << _KEY_SHIFT["wins"]) \
+        | (np.clip(gd + 1024, 0, 2047).astype(np.int64) << _KEY_SHIFT["gd"]) \
+        | (np.clip(gf, 0, 2047).astype(np.int64) << _KEY_SHIFT["gf"]) \
+        | rng.integers(0, 1 << 16, size=(n, T), dtype=np.int64)
+    order = np.argsort(-key, axis=1)
+    pos = np.empty_like(order)
+    np.put_along_axis(pos, order, np.broadcast_to(np.arange(1, T + 1), (n, T)), axis=1)
+    return pos
+
+def simulate_scores_shard(A, home, away, base, stats0, n, seed, keep=False, timed=False):
+    """Como simulate_shard, mas sorteando placares e aplicando os desempates oficiais."""
+    lap = Laps() if timed else no_laps
+    rng = np.random.default_rng(seed)
+    hg, ag = sample_scores(A, n, rng); lap("sample")
+    tab = season_table(hg, ag, home, away, base, stats0); lap("points")
+    pos = rank_packed(*tab, rng); lap("rank")
+    c = chunk_summary(tab[0], pos, (hg <= ag).astype(np.int8) + (hg < ag) if keep else None); lap("summary")
+    if timed:
+        c.timings = lap.d
+    return c
+
+def simulate_trajectory_shard(P, home, away, base, rounds, n, seed, dynamic=None):
+    """
+    Percorre as rodadas restantes em ordem num único lote de n temporadas e devolve
+    o histograma (rodadas × times × posições) da classificação ao fim de cada
+    rodada. Só os pontos correntes (n × times) ficam em memória.
+    """
+    rng = np.random.default_rng(seed)
+    o = sample_outcomes(P, n, rng) if dynamic is None else \
+        sample_dynamic_outcomes(dynamic[0], home, away, dynamic[1], n, rng, P)
+    gh, ga = HOME_PTS[o], AWAY_PTS[o]
+    T = base.size
+    row = np.arange(n)[:, None] * T
+    pts = np.broadcast_to(base, (n, T)).astype(np.int32)
+    rs = np.unique(rounds)
+    hist = np.zeros((rs.size, T, T), dtype=np.int64)
+    for i, r in enumerate(rs):
+        j = np.flatnonzero(rounds == r)
+        add = np.bincount((row + home[j]).ravel(), weights=gh[:, j].ravel(), minlength=n * T)
+        add += np.bincount((row + away[j]).ravel(), weights=ga[:, j].ravel(), minlength=n * T)
+        pts = pts + add.reshape(n, T).astype(np.int32)
+        hist[i] = position_counts(rank_positions(pts, rng))
+    return hist
@@ -0,0 +1,173 @@
+# src/exact.py
+import numpy as np
+from dataclasses import dataclass
+from types import SimpleNamespace
+from .engine import HOME_PTS, AWAY_PTS
+
+# Fim de temporada exato: com poucos jogos restantes, em vez de sortear
+# temporadas, percorre todas as combinações de resultados H/E/A, cada uma com
+# peso igual ao produto das probabilidades do modelo, e acumula a distribuição
+# exata da posição final de um time k. O desempate é por sorteio, como em
+# engine.rank_positions.
+#
+# Para não pagar 3^jogos:
+#  - times que terminam sempre acima ou sempre abaixo de k (faixas de pontos
+#    possíveis disjuntas da de k) não entram no estado. Jogos só entre eles são
+#    descartados, porque não mudam a posição de k;
+#  - os jogos são expandidos um a um, todas as combinações de uma vez (arrays).
+#    Combinações com o mesmo estado (pontos dos times relevantes) são fundidas,
+#    somando os pesos;
+#  - os jogos de k vêm primeiro. Com os pontos finais de k conhecidos, cada time
+#    que termina seus jogos vira só "acima"/"empatado" num contador;
+#  - com 'edges' (faixas de zona), ramos em que a faixa de k já está decidida
+#    são encerrados, e só as probabilidades por faixa são exatas.
+
+@dataclass
+class ExactResult:
+    positions: np.ndarray   # (T,) probabilidade exata de cada posição de k (None com edges)
+    bands: np.ndarray       # probabilidade de cada faixa de 'edges' (None sem edges)
+    live: int               # jogos enumerados (os demais não mudam a posição de k)
+    states: int             # maior número de estados distintos em memória
+
+def zone_edges(zones, T):
+    """Limites das faixas de posição que separam as zonas: ZONES -> [0, 1, 6, 12, 16, 20]."""
+    e = {0, T} | {lo - 1 for lo, _ in zones.values()} | {hi for _, hi in zones.values()}
+    return np.array(sorted(e))
+
+def _order(ch, ca, ncol):
+    # jogos de k (coluna 0) primeiro; depois, gulosamente, o jogo cujos times têm
+    # menos jogos pela frente, para que terminem (e saiam do estado) logo
+    left = np.bincount(np.r_[ch[ch >= 0], ca[ca >= 0]], minlength=ncol)
+    todo = list(range(ch.size))
+    out = [j for j in todo if ch[j] == 0 or ca[j] == 0]
+    todo = [j for j in todo if j not in out]
+    while todo:
+        j = min(todo, key=lambda j: (left[ch[j]] if ch[j] >= 0 else 0) + (left[ca[j]] if ca[j] >= 0 else 0))
+        out.append(j); todo.remove(j)
+        for c in (ch[j], ca[j]):
+            if c >= 0:
+                left[c] -= 1
+    return out
+
+def _merge(S, w):
+    # soma os pesos de linhas iguais do estado
+    v = np.ascontiguousarray(S).view(np.dtype((np.void, S.dtype.itemsize * S.shape[1]))).ravel()
+    u, inv = np.unique(v, return_inverse=True)
+    return u.view(S.dtype).reshape(-1, S.shape[1]), np.bincount(inv.ravel(), w, u.size)
+
+def solve(P, home, away, base, k, edges=None, max_states=2_000_000):
+    """
+    Distribuição exata da posição final do time k, a partir das probabilidades P
+    (jogos × 3) dos jogos restantes. Retorna ExactResult, ou None se o número de
+    estados passar de max_states (aí vale o Monte Carlo).
+    """
+    T = base.size
+    g = np.bincount(home, minlength=T) + np.bincount(away, minlength=T)
+    lo, hi = base.astype(np.int64), base + 3 * g.astype(np.int64)
+    above, below = lo > hi[k], hi < lo[k]
+    rel = ~(above | below)
+    A0 = int(above.sum())
+    live = rel[home] | rel[away]
+    h, a, Pl = home[live], away[live], P[live]
+    # colunas do estado: 0 = pontos de k, 1 = acima de k, 2 = empatados com k, 3.. = outros relevantes
+    others = np.flatnonzero(rel & (np.arange(T) != k))
+    ncol = 3 + others.size
+    col = np.full(T, -1)
+    col[k] = 0
+    col[others] = 3 + np.arange(others.size)
+    ch, ca = col[h], col[a]
+    left = np.bincount(np.r_[ch[ch >= 0], ca[ca >= 0]], minlength=ncol)
+    left[1:3] = -1  # contadores, não times
+
+    S = np.zeros((1, ncol), dtype=np.int16)
+    S[0, 0] = base[k]
+    S[0, 3:] = base[others]
+    w = np.ones(1)
+    done = np.zeros(ncol, dtype=bool)
+    bands = None if edges is None else np.zeros(len(edges) - 1)
+    peak = 1
+
+    def finish(S):
+        # times (colunas) sem jogos pela frente, depois que os pontos de k estão fechados
+        if left[0] != 0:
+            return S
+        done[0] = True
+        for c in np.flatnonzero((left == 0) & ~done):
+            S[:, 1] += S[:, c] > S[:, 0]
+            S[:, 2] += S[:, c] == S[:, 0]
+            S[:, c] = 0
+            done[c] = True
+        return S
+
+    def settle(S, w):
+        # encerra os ramos em que a faixa de posição de k já está decidida
+        open_ = np.flatnonzero(~done[3:]) + 3
+        cur, pk = S[:, open_], S[:, :1]
+        p_lo = 1 + A0 + S[:, 1] + (cur > pk).sum(axis=1)
+        p_hi = 1 + A0 + S[:, 1] + S[:, 2] + (cur + 3 * left[open_] >= pk).sum(axis=1)
+        b_lo = np.searchsorted(edges, p_lo, "left") - 1
+        b_hi = np.searchsorted(edges, p_hi, "left") - 1
+        ok = b_lo == b_hi
+        np.add.at(bands, b_lo[ok], w[ok])
+        return S[~ok], w[~ok]
+
+    S = finish(S)
+    for j in _order(ch, ca, ncol):
+        n = S.shape[0]
+        S = np.repeat(S, 3, axis=0)
+        w = (w[:, None] * Pl[j]).ravel()
+        o = np.tile(np.arange(3), n)
+        for c, pts in ((ch[j], HOME_PTS), (ca[j], AWAY_PTS)):
+            if c >= 0:
+                S[:, c] += pts[o]
+                left[c] -= 1
+        keep = w > 0
+        S, w = finish(S[keep]), w[keep]
+        if bands is not None and done[0]:
+            S, w = settle(S, w)
+        S, w = _merge(S, w)
+        peak = max(peak, S.shape[0])
+        if peak > max_states:
+            return None
+
+    # estados finais: posição uniforme entre 1+A0+acima e 1+A0+acima+empatados
+    pos = np.zeros(T)
+    first = A0 + S[:, 1].astype(np.int64)
+    ties = S[:, 2].astype(np.int64)
+    for t in np.unique(ties):
+        m = ties == t
+        for d in range(t + 1):
+            np.add.at(pos, first[m] + d, w[m] / (t + 1))
+    if bands is None:
+        return ExactResult(pos, None, int(live.sum()), peak)
+    cum = np.r_[0.0, np.cumsum(pos)]
+    return ExactResult(None, bands + np.diff(cum[edges]), int(live.sum()), peak)
+
+def points_moments(P, home, away, base):
+    """Média e desvio-padrão exatos dos pontos finais (jogos independentes) -> .mean, .sd."""
+    T = base.size
+    eh, ea = P @ HOME_PTS, P @ AWAY_PTS
+    vh = P @ HOME_PTS.astype(float) ** 2 - eh ** 2
+    va = P @ AWAY_PTS.astype(float) ** 2 - ea ** 2
+    mean = base + np.bincount(home, eh, T) + np.bincount(away, ea, T)
+    var = np.bincount(home, vh, T) + np.bincount(away, va, T)
+    return SimpleNamespace(mean=mean, sd=np.sqrt(var))
+
+@dataclass
+class ExactTable:
+    """Matriz exata times × posições no formato lido por _write_outputs (counts/n = probabilidades)."""
+    counts: np.ndarray
+    points: object
+    n: int = 1
+    exact: bool = True
+
+def exact_table(P, home, away, base, max_states=2_000_000):
+    """ExactTable com a distribuição exata de todos os times (um solve por time), ou None."""
+    T = base.size
+    rows = []
+    for k in range(T):
+        r = solve(P, home, away, base, k, max_states=max_states)
+        if r is None:
+            return None
+        rows.append(r.positions)
+    return ExactTable(np.array(rows), points_moments(P, home, away, base))
@@ -0,0 +1,79 @@
+# src/fit.py
+import numpy as np
+from . import elo, poisson
+from .engine import round_batches
+
+# Ajuste de ratings/forças a partir de jogos disputados (índices de times e
+# gols, em arrays). Poisson: máxima verossimilhança por Newton sobre
+# log λ_H = log μ_H + α_mandante + δ_visitante e log λ_A = log μ_A + α_visitante + δ_mandante,
+# com attack = exp(α), defense = exp(δ); opcionalmente com a correção de
+# Dixon–Coles (ρ) para placares baixos. Elo: replay dos resultados em ordem de
+# rodada, todos os jogos de um lote (round_batches) de uma vez.
+
+def fit_poisson(home, away, hg, ag, T, mu_home=poisson.MU_HOME, mu_away=poisson.MU_AWAY,
+                reg=1e-3, dixon_coles=False, tol=1e-10, max_iter=50):
+    """
+    (attack, defense, rho) por máxima verossimilhança. 'reg' é uma penalidade
+    ridge em log-forças (puxa times com poucos jogos para 1.0); a escala fica
+    identificada impondo média geométrica 1 em attack. Com dixon_coles, ρ é
+    estimado depois, com as taxas fixas (perfil de verossimilhança em 1-D).
+    """
+    # observações: gols do mandante e do visitante -> (quem ataca, quem defende)
+    ia = np.concatenate([home, away])
+    id_ = T + np.concatenate([away, home])
+    y = np.concatenate([hg, ag]).astype(float)
+    off = np.log(np.concatenate([np.full(home.size, mu_home), np.full(away.size, mu_away)]))
+    theta = np.zeros(2 * T)
+    for _ in range(max_iter):
+        lam = np.exp(off + theta[ia] + theta[id_])
+        r = y - lam
+        g = np.bincount(ia, r, 2 * T) + np.bincount(id_, r, 2 * T) - reg * theta
+        # Hessiana (negativa) X'WX montada por scatter-add: diagonais e blocos ataque × defesa
+        H = np.bincount(ia * 2 * T + ia, lam, 4 * T * T) + np.bincount(id_ * 2 * T + id_, lam, 4 * T * T)
+        H += np.bincount(ia * 2 * T + id_, lam, 4 * T * T) + np.bincount(id_ * 2 * T + ia, lam, 4 * T * T)
+        H = H.reshape(2 * T, 2 * T) + reg * np.eye(2 * T)
+        step = np.linalg.solve(H, g)
+        theta += step
+        if np.abs(step).max() < tol:
+            break
+    a, d = theta[:T], theta[T:]
+    c = a.mean()
+    attack, defense = np.exp(a - c), np.exp(d + c)
+    rho = fit_rho(mu_home * attack[home] * defense[away], mu_away * attack[away] * defense[home], hg, ag) \
+        if dixon_coles else 0.0
+    return attack, defense, rho
+
+def fit_rho(lamH, lamA, hg, ag, iters=60):
+    """ρ de Dixon–Coles que maximiza Σ log τ nos jogos com placar baixo (seção áurea)."""
+    low = (hg <= 1) & (ag <= 1)
+    if not low.any():
+        return 0.0
+    lh, la, i, j = lamH[low], lamA[low], hg[low], ag[low]
+    def ll(rho):
+        return np.log(poisson.dc_tau(lh, la, rho)[np.arange(lh.size), i, j]).sum()
+    # τ > 0 em todos os jogos: limites de ρ
+    lo = max(-1.0 / lh.max(), -1.0 / la.max()) + 1e-9
+    hi = min(1.0 / (lh * la).max(), 1.0) - 1e-9
+    g = (np.sqrt(5) - 1) / 2
+    x1, x2 = hi - g * (hi - lo), lo + g * (hi - lo)
+    f1, f2 = ll(x1), ll(x2)
+    for _ in range(iters):
+        if f1 < f2:
+            lo, x1, f1 = x1, x2, f2
+            x2 = lo + g * (hi - lo); f2 = ll(x2)
+        else:
+            hi, x2, f2 = x2, x1, f1
+            x1 = hi - g * (hi - lo); f1 = ll(x1)
+    return float((lo + hi) / 2)
+
+def replay_elo(home, away, hg, ag, rounds, T, init=None, k=elo.K_FACTOR,
+               home_adv=elo.HOME_ADV, gamma=elo.GAMMA):
+    """Ratings finais após o replay dos resultados em ordem de rodada (início: init ou DEFAULT_ELO)."""
+    R = np.full(T, elo.DEFAULT_ELO) if init is None else np.asarray(init, dtype=float).copy()
+    o = (hg <= ag).astype(np.int8) + (hg < ag)  # 0=H, 1=E, 2=A
+    for j in round_batches(home, away, rounds):
+        h, a = home[j], away[j]
+        d = elo.elo_delta(elo.expected_score(R[h], R[a], home_adv, gamma), o[j], k)
+        R[h] += d
+        R[a] -= d
+    return R
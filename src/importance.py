@@ -0,0 +1,73 @@
+# src/importance.py
+import numpy as np
+from .engine import HOME_PTS, AWAY_PTS, sample_outcomes, season_points, rank_positions, shard_seeds
+from .stats import Z95
+
+# Amostragem por importância para eventos raros do tipo "time j termina entre
+# as posições lo..hi". Os jogos do time j são sorteados de uma distribuição
+# inclinada q ∝ p·exp(θ·pontos_j) e cada temporada recebe o peso Π p/q.
+
+def tilt_probs(P, home, away, team, theta):
+    """
+    Tabela (jogos × 3) inclinada: nos jogos de 'team', q ∝ p·exp(θ·pontos do time);
+    θ > 0 favorece o time, θ < 0 o prejudica. Demais jogos ficam iguais.
+    """
+    g = np.zeros_like(P)
+    g[home == team] = HOME_PTS
+    g[away == team] = AWAY_PTS
+    Q = P * np.exp(theta * g)
+    return Q / Q.sum(axis=1, keepdims=True)
+
+def simulate_weighted_shard(P, Q, home, away, base, n, seed, team, lo, hi):
+    """
+    Simula n temporadas sob Q e devolve somas para o estimador ponderado:
+    (Σ w·1E, Σ (w·1E)², Σ w, Σ w², ocorrências do evento).
+    """
+    rng = np.random.default_rng(seed)
+    o = sample_outcomes(Q, n, rng)
+    pos = rank_positions(season_points(o, home, away, base), rng)[:, team]
+    with np.errstate(divide="ignore"):
+        L = np.log(P) - np.log(Q)  # log-razão de verossimilhança por jogo/resultado
+    w = np.exp(L[np.arange(P.shape[0]), o].sum(axis=1))
+    hit = (pos >= lo) & (pos <= hi)
+    wh = w * hit
+    return np.array([wh.sum(), (wh * wh).sum(), w.sum(), (w * w).sum(), hit.sum()])
+
+def estimate(P, home, away, base, n_sims, seed, team, lo, hi, theta, shard_size=10000, first_shard=0):
+    """Estimativa não viesada de P(lo <= pos <= hi) sob inclinação θ, com EP e ESS."""
+    Q = tilt_probs(P, home, away, team, theta)
+    sizes = [min(shard_size, n_sims - i0) for i0 in range(0, n_sims, shard_size)]
+    seeds = shard_seeds(seed, first_shard, first_shard + len(sizes))
+    acc = np.zeros(5)
+    for n, sd in zip(sizes, seeds):
+        acc += simulate_weighted_shard(P, Q, home, away, base, n, sd, team, lo, hi)
+    swh, swh2, sw, sw2, hits = acc
+    p = swh / n_sims
+    se = np.sqrt(max(swh2 / n_sims - p * p, 0.0) / n_sims)
+    return {
+        "prob": float(p),
+        "se": float(se),
+        "ci95": (float(max(p - Z95 * se, 0.0)), float(min(p + Z95 * se, 1.0))),
+        "ess": float(sw * sw / sw2) if sw2 > 0 else 0.0,
+        "theta": float(theta),
+        "hits": int(hits),
+        "n_sims": int(n_sims),
+    }
+
+def pick_theta(P, home, away, base, seed, team, lo, hi, pilot=2000, grid=None):
+    """
+    Escolhe θ por um piloto curto: testa uma grade (sinal dado pela direção do
+    evento: posições altas -> θ > 0) e fica com o menor erro relativo.
+    O piloto usa lotes separados (spawn_key a partir de 2**31), sem reaproveitar
+    os fluxos da estimativa final; todos os θ da grade usam os mesmos sorteios.
+    """
+    T = base.size
+    sign = 1.0 if (lo + hi) / 2 <= (T + 1) / 2 else -1.0
+    grid = np.linspace(0.0, 1.5, 7) if grid is None else np.asarray(grid, dtype=float)
+    best, best_rel = 0.0, np.inf
+    for th in sign * grid:
+        r = estimate(P, home, away, base, pilot, seed, team, lo, hi, th, pilot, first_shard=2**31)
+        rel = r["se"] / r["prob"] if r["prob"] > 0 else np.inf
+        if rel < best_rel:
+            best, best_rel = th, rel
+    return best
@@ -0,0 +1,178 @@
+# src/ingest.py
+import hashlib, json, os, re
+from pathlib import Path
+from .league import TABLE, REMAINING, normalize_name, played_mask, read_fixtures
+
+# Ingestão da classificação a partir de um HTML salvo localmente (ou de uma URL,
+# p. ex. um servidor local com a página). Só a tabela de classificação é
+# extraída, por XPath com lxml, sem passar por todas as tabelas da página. O
+# resultado fica em cache pelo sha256 do HTML. current_table.csv e
+# remaining_matches.csv só são regravados quando algum time mudou; nos jogos
+# restantes, só os jogos dos times que mudaram são conferidos.
+#   python fetch_current_table.py --html snapshots/serie_a.html
+
+FIXTURES = "data/fixtures_38r.csv"
+CACHE_DIR = ".cache/ingest"
+CACHE_VERSION = 2  # muda quando o parser muda (caches antigos deixam de valer)
+
+# cabeçalho da tabela -> coluna de current_table.csv
+_HEADERS = {"pos": "Pos", "team": "Team", "club": "Team", "pld": "Played", "played": "Played",
+            "w": "W", "won": "W", "gf": "GF", "ga": "GA", "pts": "Points", "points": "Points"}
+# marcas de campeão/rebaixado/qualificado e notas de rodapé: "Flamengo (C)", "Sport[a]"
+_MARKS = re.compile(r"\s*(\((?:C|R|Q|X|T|E)\)|\[[^\]]*\])")
+
+def read_source(html=None, url=None, timeout=30):
+    """Bytes do HTML: arquivo local ('html') ou 'url' (urllib)."""
+    if html:
+        return Path(html).read_bytes()
+    if url:
+        from urllib.request import urlopen
+        with urlopen(url, timeout=timeout) as r:
+            return r.read()
+    raise ValueError("Informe o HTML salvo (html) ou a URL (url)")
+
+def _text(el):
+    return _MARKS.sub("", " ".join(el.text_content().split()))
+
+def _int(s):
+    s = s.replace("−", "-").replace("+", "").strip()
+    return int(s) if re.fullmatch(r"-?\d+", s) else None
+
+def _span(el, attr):
+    v = _int(el.get(attr, "1") or "1")
+    return v if v and v > 0 else 1
+
+def _grid(rows):
+    # textos das células linha a linha, com rowspan/colspan expandidos: a coluna
+    # "Qualification or relegation" da Wikipedia ocupa várias linhas com uma
+    # célula só, e as linhas seguintes vêm mais curtas
+    out, carry = [], {}  # carry: coluna -> [texto, linhas que ainda ocupa]
+    for tr in rows:
+        cells, line = list(tr.xpath("./th|./td")), []
+        while cells or len(line) in carry:
+            col = len(line)
+            if col in carry:
+                line.append(carry[col][0])
+                carry[col][1] -= 1
+                if carry[col][1] == 0:
+                    del carry[col]
+                continue
+            c = cells.pop(0)
+            text, rs = _text(c), _span(c, "rowspan")
+            for _ in range(_span(c, "colspan")):
+                if rs > 1:
+                    carry[len(line)] = [text, rs - 1]
+                line.append(text)
+        out.append(line)
+    return out
+
+def parse_standings(content):
+    """
+    [{Team, Points, Played[, W, GF, GA]}, ...] da tabela de classificação do HTML:
+    a primeira <table> cujo cabeçalho tenha Pos, Team/Club, Pld e Pts.
+    """
+    import lxml.html
+    if isinstance(content, bytes):
+        # sem <meta charset>, o lxml supõe latin-1; páginas salvas costumam ser UTF-8
+        try:
+            content = content.decode("utf-8")
+        except UnicodeDecodeError:
+            content = content.decode("latin-1")
+    doc = lxml.html.fromstring(content)
+    for table in doc.xpath("//table[.//th[starts-with(normalize-space(.), 'Pos')]]"):
+        rows = _grid(table.xpath("./tr|./thead/tr|./tbody/tr"))
+        if not rows:
+            continue
+        head = [_HEADERS.get(c.lower().rstrip(".")) for c in rows[0]]
+        if not {"Team", "Played", "Points"} <= set(head):
+            continue
+        # só as colunas usadas (a primeira de cada nome); as demais podem faltar
+        cols = {}
+        for i, h in enumerate(head):
+            if h:
+                cols.setdefault(h, i)
+        out = []
+        for cells in rows[1:]:
+            if max(cols.values()) >= len(cells):
+                continue
+            rec = {h: cells[i] for h, i in cols.items()}
+            vals = {h: _int(rec[h]) for h in ("Points", "Played", "W", "GF", "GA") if h in rec}
+            if not rec["Team"] or vals["Points"] is None or vals["Played"] is None:
+                continue
+            out.append({"Team": normalize_name(rec["Team"]), **vals})
+        if out:
+            return out
+    raise ValueError("Tabela de classificação não encontrada no HTML (cabeçalho com Pos, Team, Pld, Pts)")
+
+def parse_cached(content, cache_dir=CACHE_DIR):
+    """parse_standings com cache em disco pelo sha256 do HTML -> (linhas, digest, veio_do_cache)."""
+    digest = hashlib.sha256(content).hexdigest()
+    path = Path(cache_dir) / f"standings_v{CACHE_VERSION}_{digest[:32]}.json"
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8")), digest, True
+    rows = parse_standings(content)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(rows, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+    return rows, digest, False
+
+def _write_csv(df, path):
+    tmp = Path(str(path) + ".tmp")
+    df.to_csv(tmp, index=False, encoding="utf-8-sig")  # UTF-8 com BOM: Excel abre com acentos
+    os.replace(tmp, path)
+
+def update_league(rows, table=TABLE, remaining=REMAINING, fixtures=FIXTURES):
+    """
+    Aplica a classificação 'rows' aos CSVs. Retorna {'changed': [times], 'table': bool,
+    'remaining': bool, 'played_now': int}. Só regrava o que mudou. Jogos restantes:
+    remove os que passaram a disputados (regra de played_mask), olhando só os
+    jogos dos times que mudaram. Se algum Played diminuiu (correção da fonte) ou se
+    não há remaining, refaz a partir do calendário completo. ValueError, sem gravar
+    nada, se o número de times difere do da tabela atual.
+    """
+    import pandas as pd
+    new = pd.DataFrame(rows)
+    cols = ["Team", "Points", "Played"] + [c for c in ("W", "GF", "GA") if c in new.columns]
+    new = new[cols]
+    dup = new["Team"][new["Team"].duplicated()].tolist()
+    if dup:
+        raise ValueError(f"Times repetidos na classificação: {sorted(set(dup))}")
+    try:
+        old = pd.read_csv(table, encoding="utf-8-sig")
+        old["Team"] = old["Team"].map(normalize_name)
+        old = old.set_index("Team")
+    except OSError:
+        old = pd.DataFrame(columns=cols[1:])
+    # tabela lida pela metade (linhas perdidas na extração) não pode sobrescrever a atual
+    if len(old) and len(new) != len(old):
+        raise ValueError(f"A classificação extraída tem {len(new)} times; {table} tem {len(old)}. "
+                         "Nada foi gravado")
+    same_cols = list(old.columns) == cols[1:]
+
+    cur = new.set_index("Team")
+    common = [c for c in cols[1:] if c in old.columns]
+    changed = [t for t in cur.index if t not in old.index or any(old.at[t, c] != cur.at[t, c] for c in common)]
+    dropped = [t for t in old.index if t not in cur.index]
+    res = {"changed": changed + dropped, "table": False, "remaining": False, "played_now": 0}
+    if not res["changed"] and same_cols:
+        return res
+    _write_csv(new, table)
+    res["table"] = True
+
+    idx = {t: i for i, t in enumerate(cur.index)}
+    played = cur["Played"].to_numpy()
+    went_back = any(t in old.index and cur.at[t, "Played"] < old.at[t, "Played"] for t in cur.index)
+    full = went_back or dropped or not Path(remaining).exists()
+    m = read_fixtures(fixtures if full else remaining)
+    m = m[m["home"].isin(idx) & m["away"].isin(idx)]
+    look = m.index if full else m.index[m["home"].isin(changed) | m["away"].isin(changed)]
+    sub = m.loc[look]
+    done = played_mask(sub["home"].map(idx).to_numpy(), sub["away"].map(idx).to_numpy(),
+                       sub["round"].astype(int).to_numpy(), played)
+    if full or done.any():
+        keep = m.drop(index=sub.index[done])[["round", "home", "away"]]
+        _write_csv(keep.sort_values(["round", "home", "away"]) if full else keep, remaining)
+        res["remaining"] = True
+        res["played_now"] = int(done.sum())
+    return res
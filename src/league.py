@@ -0,0 +1,268 @@
+# src/league.py
+import hashlib, json, os
+import numpy as np
+from dataclasses import dataclass
+from pathlib import Path
+
+# Liga compilada: current_table.csv, remaining_matches.csv, team_ratings.csv e
+# team_strengths.csv lidos, normalizados e validados uma vez, viram arrays
+# indexados pelos times e um snapshot .npz ao lado de current_table.csv. O
+# snapshot só é refeito quando muda o conteúdo de algum CSV (mtime/tamanho
+# primeiro; se só o mtime mudou, confere o sha256). Enquanto está em dia, a
+# carga usa apenas numpy.
+LEAGUE_VERSION = 3  # mude quando mudar o formato do snapshot
+
+TABLE = "data/current_table.csv"
+REMAINING = "data/remaining_matches.csv"
+RATINGS = "data/team_ratings.csv"
+STRENGTHS = "data/team_strengths.csv"
+
+NAME_FIX = {
+    "Atlético": "Atlético Mineiro",
+    "Atletico Mineiro": "Atlético Mineiro",
+    "RB Bragantino": "Red Bull Bragantino",
+    "Bragantino": "Red Bull Bragantino",
+    "Sao Paulo": "São Paulo",
+    "Gremio": "Grêmio",
+}
+
+def normalize_name(s: str) -> str:
+    if not isinstance(s, str):
+        s = str(s)
+    s = s.replace("\xa0", " ").strip()
+    while "  " in s:
+        s = s.replace("  ", " ")
+    return NAME_FIX.get(s, s)
+
+@dataclass
+class League:
+    teams: list
+    points: np.ndarray      # (T,) int32
+    played: np.ndarray      # (T,) int32
+    stats0: np.ndarray      # (T, 3) int32: vitórias, gols pró, gols contra (0 se ausentes no CSV)
+    home: np.ndarray        # (jogos,) índices dos mandantes, na ordem de remaining_matches
+    away: np.ndarray
+    rounds: np.ndarray      # (jogos,) int32 (0 se não houver coluna round)
+    elo: np.ndarray         # (T,) float, NaN = sem rating
+    attack: np.ndarray      # (T,) float, NaN = sem força
+    defense: np.ndarray
+    rho: float = 0.0        # Dixon–Coles (coluna opcional 'rho' de team_strengths.csv)
+    issues: dict = None     # {'ratings'|'strengths': problema} de arquivo presente mas ilegível
+
+    @property
+    def index(self):
+        return {t: i for i, t in enumerate(self.teams)}
+
+    @property
+    def r_elo(self):
+        """{Team: Elo} dos times com rating, ou None se nenhum tiver."""
+        ok = ~np.isnan(self.elo)
+        return {t: float(e) for t, e, k in zip(self.teams, self.elo, ok) if k} if ok.any() else None
+
+    @property
+    def str_lookup(self):
+        """{Team: (attack, defense)} dos times com forças, ou None se nenhum tiver."""
+        ok = ~(np.isnan(self.attack) | np.isnan(self.defense))
+        return {t: (float(a), float(d)) for t, a, d, k in zip(self.teams, self.attack, self.defense, ok) if k} \
+            if ok.any() else None
+
+    def remaining(self):
+        """Jogos restantes por time (mandante ou visitante)."""
+        T = len(self.teams)
+        return np.bincount(self.home, minlength=T) + np.bincount(self.away, minlength=T)
+
+    def save(self, path, stamp=""):
+        np.savez(path, version=LEAGUE_VERSION, stamp=np.array(stamp), teams=np.array(self.teams, dtype=str),
+                 points=self.points, played=self.played, stats0=self.stats0, home=self.home, away=self.away,
+                 rounds=self.rounds, elo=self.elo, attack=self.attack, defense=self.defense, rho=self.rho,
+                 issues=np.array(json.dumps(self.issues or {})))
+
+    @classmethod
+    def load(cls, path):
+        z = np.load(path, allow_pickle=False)
+        if int(z["version"]) != LEAGUE_VERSION:
+            raise ValueError(f"Snapshot {path} com versão {int(z['version'])}; esperada {LEAGUE_VERSION}")
+        return cls(z["teams"].tolist(), z["points"], z["played"], z["stats0"], z["home"], z["away"],
+                   z["rounds"], z["elo"], z["attack"], z["defense"], float(z["rho"]),
+                   json.loads(str(z["issues"]))), str(z["stamp"])
+
+def read_fixtures(path):
+    """CSV de jogos (round, home, away) com nomes normalizados, como DataFrame."""
+    import pandas as pd
+    m = pd.read_csv(path, encoding="utf-8-sig")
+    m.columns = [c.strip().lower() for c in m.columns]
+    missing = {"home", "away"} - set(m.columns)
+    if missing:
+        raise ValueError(f"{path}: faltam as colunas {sorted(missing)} (obtido: {m.columns.tolist()})")
+    for c in ("home", "away"):
+        m[c] = m[c].map(normalize_name)
+    return m
+
+def played_mask(home, away, rounds, played):
+    """
+    Jogos já disputados de um calendário (índices home/away, rodadas): o jogo da
+    rodada r conta como disputado se os dois times têm Played >= r.
+    """
+    played = np.asarray(played)
+    return (played[home] >= rounds) & (played[away] >= rounds)
+
+def read_table(path=TABLE):
+    """
+    current_table.csv com nomes normalizados, como DataFrame (Team, Points, ...),
+    sem olhar os jogos: ValueError se faltar Team/Points ou houver time repetido.
+    """
+    import pandas as pd
+    t = pd.read_csv(path, encoding="utf-8-sig")
+    t.columns = [c.strip() for c in t.columns]
+    missing = {"Team", "Points"} - set(t.columns)
+    if missing:
+        raise ValueError(f"{path}: faltam as colunas {sorted(missing)} (obtido: {t.columns.tolist()})")
+    t["Team"] = t["Team"].map(normalize_name)
+    dup = t["Team"][t["Team"].duplicated()].tolist()
+    if dup:
+        raise ValueError(f"{path}: times repetidos {sorted(set(dup))}")
+    return t
+
+def compile_league(table=TABLE, remaining=REMAINING, ratings=RATINGS, strengths=STRENGTHS):
+    """
+    Lê e valida os CSVs e devolve a League. Ratings e forças são opcionais: arquivo
+    ausente -> NaN; arquivo presente mas ilegível (sem as colunas, sem nenhum valor
+    numérico) -> NaN e o problema em League.issues, para o método que precisa dele
+    acusar (SeasonSimulator). remaining_matches ausente (ou None) -> nenhum jogo.
+    """
+    import pandas as pd
+    from .poisson import as_lookup
+
+    t = read_table(table)
+    teams = t["Team"].tolist()
+    idx = {tm: i for i, tm in enumerate(teams)}
+    T = len(teams)
+
+    cols = {c.lower(): c for c in t.columns}
+    def _col(*names, errors="coerce"):
+        c = next((cols[n] for n in names if n in cols), None)
+        return np.zeros(T, dtype=np.int32) if c is None else \
+            pd.to_numeric(t[c], errors=errors).fillna(0).to_numpy(dtype=np.int32)
+    points = _col("points", errors="raise")
+    played = _col("played", errors="raise")
+    stats0 = np.stack([_col("w", "won", "wins"), _col("gf", "goals_for"), _col("ga", "goals_against")], axis=1)
+
+    if remaining is not None and Path(remaining).exists():
+        m = read_fixtures(remaining)
+    else:
+        m = pd.DataFrame(columns=["round", "home", "away"])
+    # Checagem preventiva: todo time citado em remaining_matches deve existir em current_table
+    missing = (set(m["home"]) | set(m["away"])) - set(teams)
+    if missing:
+        raise KeyError(f"Times em remaining_matches sem correspondência em current_table: {sorted(missing)}")
+    home = m["home"].map(idx).to_numpy(dtype=np.intp)
+    away = m["away"].map(idx).to_numpy(dtype=np.intp)
+    if (home == away).any():
+        j = int(np.flatnonzero(home == away)[0])
+        raise ValueError(f"{remaining}: jogo de um time contra si mesmo ({teams[home[j]]}, linha {j + 2})")
+    rounds = pd.to_numeric(m["round"], errors="coerce").fillna(0).to_numpy(dtype=np.int32) \
+        if "round" in m.columns else np.zeros(len(m), dtype=np.int32)
+
+    issues = {}
+    elo = np.full(T, np.nan)
+    try:
+        r = pd.read_csv(ratings, encoding="utf-8-sig")
+        if not {"Team", "Elo"} <= set(r.columns):
+            raise ValueError(f"faltam as colunas Team, Elo (obtido: {r.columns.tolist()})")
+        r["Team"] = r["Team"].map(normalize_name)
+        r["Elo"] = pd.to_numeric(r["Elo"], errors="coerce")
+        for tm, e in zip(r["Team"], r["Elo"]):
+            if tm in idx and not np.isnan(e):
+                elo[idx[tm]] = e
+        if np.isnan(elo).all():
+            raise ValueError("nenhum Elo numérico para os times da tabela")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        issues["ratings"] = f"{ratings}: {e}"
+
+    attack, defense = np.full(T, np.nan), np.full(T, np.nan)
+    rho = 0.0
+    try:
+        s = pd.read_csv(strengths, encoding="utf-8-sig")
+        if "Team" not in s.columns:
+            raise ValueError(f"falta a coluna Team (obtido: {s.columns.tolist()})")
+        s["Team"] = s["Team"].map(normalize_name)
+        try:
+            lut = as_lookup(s)
+        except KeyError as e:
+            raise ValueError(e.args[0]) from None
+        for tm, (a, d) in lut.items():
+            if tm in idx:
+                attack[idx[tm]], defense[idx[tm]] = a, d
+        if np.isnan(attack).all():
+            raise ValueError("nenhuma força (ataque/defesa) numérica para os times da tabela")
+        if "rho" in s.columns:
+            v = pd.to_numeric(s["rho"], errors="coerce").dropna()
+            if v.empty:
+                raise ValueError("coluna rho sem valor numérico")
+            rho = float(v.iloc[0])
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        issues["strengths"] = f"{strengths}: {e}"
+
+    return League(teams, points, played, stats0, home, away, rounds, elo, attack, defense, rho, issues)
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for b in iter(lambda: f.read(1 << 20), b""):
+            h.update(b)
+    return h.hexdigest()
+
+def _stamp(paths, hashes=False):
+    # [(caminho, mtime_ns, tamanho[, sha256])] dos CSVs; arquivo ausente -> -1
+    out = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+            out.append([str(p), st.st_mtime_ns, st.st_size] + ([_sha256(p)] if hashes else []))
+        except OSError:
+            out.append([str(p), -1, -1] + ([""] if hashes else []))
+    return out
+
+def source_stamp(table=TABLE, remaining=REMAINING, ratings=RATINGS, strengths=STRENGTHS):
+    """Carimbo barato (caminho, mtime, tamanho) dos quatro CSVs: muda quando algum arquivo muda."""
+    return tuple(tuple(s) for s in _stamp((table, remaining, ratings, strengths)))
+
+def snapshot_path(table=TABLE):
+    return Path(table).with_name("league_snapshot.npz")
+
+def load_league(table=TABLE, remaining=REMAINING, ratings=RATINGS, strengths=STRENGTHS, snapshot=None):
+    """
+    League dos quatro CSVs, via snapshot (padrão: league_snapshot.npz ao lado de
+    current_table.csv) quando ele está em dia; senão compila e regrava o snapshot.
+    """
+    paths = (table, remaining, ratings, strengths)
+    snap = Path(snapshot) if snapshot else snapshot_path(table)
+    cur = _stamp(paths)
+    if snap.exists():
+        try:
+            lg, stamp = League.load(snap)
+            old = json.loads(stamp)
+            if [s[:3] for s in old] == cur:
+                return lg
+            # mtime mudou (checkout, cópia): se o conteúdo for o mesmo, só atualiza o carimbo
+            new = _stamp(paths, hashes=True)
+            if [s[3] for s in old] == [s[3] for s in new] and [s[2] for s in old] == [s[2] for s in new]:
+                _save(lg, snap, new)
+                return lg
+        except (OSError, KeyError, ValueError, IndexError):
+            pass
+    lg = compile_league(*paths)
+    _save(lg, snap, _stamp(paths, hashes=True))
+    return lg
+
+def _save(lg, snap, stamp):
+    tmp = snap.with_name(snap.name + ".tmp.npz")
+    try:
+        lg.save(tmp, json.dumps(stamp))
+        os.replace(tmp, snap)  # escrita atômica
+    except OSError:
+        pass  # pasta de dados só leitura: segue sem snapshot
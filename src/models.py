@@ -0,0 +1,102 @@
+# src/models.py
+import numpy as np
+from dataclasses import dataclass
+from . import elo, poisson
+
+# Interface comum dos modelos: probs(home_idx, away_idx) -> array (n, 3) com
+# (pH, pE, pA), recebendo arrays de índices de times (posição em `teams`).
+
+@dataclass
+class BaselineModel:
+    ratings: np.ndarray          # Elo por índice de time (1500 quando ausente)
+    home_adv: float = 50.0
+    scale: float = 150.0         # escala logística natural
+    base_draw: float = 0.28
+
+    def probs(self, home, away):
+        diff = (self.ratings[home] + self.home_adv) - self.ratings[away]
+        pE = np.clip(self.base_draw + 0.10*np.exp(-np.abs(diff)/100.0), 0.18, 0.36)
+        dec = 1 - pE; pH_no = 1/(1 + np.exp(-diff/self.scale))
+        return np.stack([dec*pH_no, pE, dec*(1 - pH_no)], axis=-1)
+
+@dataclass
+class EloModel:
+    ratings: np.ndarray
+    home_adv: float = elo.HOME_ADV
+    gamma: float = elo.GAMMA
+    base_draw: float = elo.BASE_DRAW
+    dynamic_draw: bool = elo.USE_DYNAMIC_DRAW
+    beta: float = elo.BETA
+    tau: float = elo.TAU
+
+    def probs(self, home, away):
+        return self.rating_probs(self.ratings[home], self.ratings[away])
+
+    def rating_probs(self, Rh, Ra):
+        """(pH, pE, pA) a partir dos Elo de mandante/visitante (arrays de mesmo shape)."""
+        return elo.elo_probs(Rh, Ra, self.home_adv, self.gamma, self.base_draw,
+                             self.dynamic_draw, self.beta, self.tau)
+
+    def rating_parts(self, Rh, Ra):
+        """(e, pE) a partir dos Elo, sem montar o array (..., 3) — ver elo.elo_parts."""
+        return elo.elo_parts(Rh, Ra, self.home_adv, self.gamma, self.base_draw,
+                             self.dynamic_draw, self.beta, self.tau)
+
+@dataclass
+class DynamicEloModel(EloModel):
+    # Elo dinâmico: cada temporada simulada atualiza os ratings jogo a jogo com
+    # fator K (ver engine.sample_dynamic_outcomes); probs() dá os do início.
+    k: float = elo.K_FACTOR
+
+    def delta(self, e, o):
+        """Variação do Elo do mandante (o visitante perde o mesmo) após os resultados o."""
+        return elo.elo_delta(e, o, self.k)
+
+@dataclass
+class PoissonModel:
+    attack: np.ndarray
+    defense: np.ndarray
+    mu_home: float = poisson.MU_HOME
+    mu_away: float = poisson.MU_AWAY
+    gmax: int = 10
+    rho: float = 0.0             # correção de Dixon–Coles (0 = Poisson independente)
+
+    def rates(self, home, away):
+        """Taxas (λ_H, λ_A) de gols por jogo."""
+        lamH = self.mu_home * self.attack[home] * self.defense[away]
+        lamA = self.mu_away * self.attack[away] * self.defense[home]
+        return lamH, lamA
+
+    def probs(self, home, away):
+        return poisson.poisson_probs(*self.rates(home, away), self.gmax, self.rho)
+
+    def score_grid(self, home, away):
+        """Grade conjunta (n, gmax+1, gmax+1) de placares por jogo."""
+        return poisson.score_grid(*self.rates(home, away), self.gmax, self.rho)
+
+def score_grid(model, home, away, gmax=10):
+    """
+    Grade de placares usada no modo com placares. Poisson usa a própria grade;
+    os demais modelos usam a grade Poisson de taxas médias (MU_HOME, MU_AWAY),
+    que depois é reescalada para respeitar o (pH, pE, pA) do modelo.
+    """
+    if hasattr(model, "score_grid"):
+        return model.score_grid(home, away)
+    n = np.shape(home)[0]
+    return poisson.score_grid(np.full(n, poisson.MU_HOME), np.full(n, poisson.MU_AWAY), gmax)
+
+def make_model(method, teams, r_elo=None, str_lookup=None, elo_k=None, rho=0.0):
+    """
+    Monta o modelo de 'method' sobre a lista de times (índice = posição na lista).
+    Sem ratings/forças disponíveis, cai no baseline (como antes). Com elo_k, o
+    método elo vira Elo dinâmico com esse fator K; rho é a correção de
+    Dixon–Coles do método poisson.
+    """
+    r_elo = r_elo or {}
+    ratings = np.array([float(r_elo.get(t, elo.DEFAULT_ELO)) for t in teams])
+    if method == 'elo' and r_elo:
+        return DynamicEloModel(ratings, k=float(elo_k)) if elo_k else EloModel(ratings)
+    if method == 'poisson' and str_lookup:
+        ad = np.array([str_lookup.get(t, (1.0, 1.0)) for t in teams], dtype=float).reshape(-1, 2)
+        return PoissonModel(ad[:, 0], ad[:, 1], rho=float(rho))
+    return BaselineModel(ratings)
@@ -12,7 +12,7 @@ def _pick_col(df, candidates):
             return cols[c]
     raise KeyError(f"Coluna não encontrada. Candidatei: {candidates} — existentes: {list(df.columns)}")
 
-def _as_lookup(strengths):
+def as_lookup(strengths):
     """
     Converte 'strengths' em um dict {Team: (attack, defense)}.
     Aceita DataFrame (com colunas de ataque/defesa) OU dict já pronto.
@@ -51,24 +51,56 @@ def _as_lookup(strengths):
     mask = ~(np.isnan(a) | np.isnan(d))
     return {t: (float(aa), float(dd)) for t, aa, dd in zip(teams[mask], a[mask], d[mask])}
 
+_as_lookup = as_lookup  # nome antigo
+
 def _poisson_pmf(lam, kmax):
-    """PMF de Poisson até kmax (inclusivo), sem fatorial explícito."""
-    pmf = np.empty(kmax + 1, dtype=float)
-    pmf[0] = np.exp(-lam)
-    for k in range(1, kmax + 1):
-        pmf[k] = pmf[k-1] * lam / k
+    """
+    PMF de Poisson até kmax (inclusivo), sem fatorial explícito.
+    'lam' pode ser escalar ou array: o resultado tem shape lam.shape + (kmax+1,).
+    """
+    lam = np.asarray(lam, dtype=float)[..., None]
+    k = np.arange(1, kmax + 1)
+    pmf = np.exp(-lam) * np.concatenate(
+        [np.ones_like(lam), np.cumprod(lam / k, axis=-1)], axis=-1)
     # pequena normalização numérica (caso kmax seja baixo)
-    s = pmf.sum()
-    if s > 0:
-        pmf /= s
-    return pmf
+    s = pmf.sum(axis=-1, keepdims=True)
+    return np.divide(pmf, s, out=pmf, where=s > 0)
+
+def poisson_probs(lamH, lamA, gmax=10, rho=0.0):
+    """
+    Versão vetorizada: arrays de taxas λ_H e λ_A (mesmo shape) -> array (..., 3)
+    com (pH, pE, pA). As PMFs truncadas e os produtos da grade de placares são
+    montados por broadcasting para todos os jogos de uma vez. Com rho != 0, usa a
+    grade com a correção de Dixon–Coles (ver score_grid).
+    """
+    if rho:
+        g = score_grid(lamH, lamA, gmax, rho)
+        pH = np.tril(np.ones(g.shape[-2:]), -1)
+        return np.stack([(g * pH).sum(axis=(-2, -1)), np.trace(g, axis1=-2, axis2=-1),
+                         (g * pH.T).sum(axis=(-2, -1))], axis=-1)
+    # PMFs truncadas até gmax (rápido e suficiente para futebol)
+    pmfH = _poisson_pmf(lamH, gmax)
+    pmfA = _poisson_pmf(lamA, gmax)
+    cdfA = np.cumsum(pmfA, axis=-1)
+
+    # Empate: sum_k P_H(k) * P_A(k)
+    pE = np.einsum("...k,...k->...", pmfH, pmfA)
+
+    # Mandante vence: sum_i P_H(i) * P_A(<= i-1)
+    cdfA_prev = np.concatenate([np.zeros_like(cdfA[..., :1]), cdfA[..., :-1]], axis=-1)
+    pH = np.einsum("...k,...k->...", pmfH, cdfA_prev)
+
+    # Visitante vence: complemento; saneamento e normalização de drift numérico
+    P = np.clip(np.stack([pH, pE, 1.0 - pH - pE], axis=-1), 0.0, 1.0)
+    s = P.sum(axis=-1, keepdims=True)
+    return np.divide(P, s, out=P, where=s > 0)
 
 def poisson_match_probs(home: str, away: str, strengths, mu_home=MU_HOME, mu_away=MU_AWAY, gmax=10):
     """
     Calcula (pH, pE, pA) com taxas λ_H = mu_home * a_H * d_A e λ_A = mu_away * a_A * d_H.
     'strengths' pode ser DataFrame (com Team + a/attack/atk, d/defense/def) ou dict {Team: (a,d)}.
     """
-    lut = _as_lookup(strengths)  # dict {Team: (a, d)}
+    lut = as_lookup(strengths)  # dict {Team: (a, d)}
 
     aH, dH = lut.get(home, (1.0, 1.0))
     aA, dA = lut.get(away, (1.0, 1.0))
@@ -76,29 +108,25 @@ def poisson_match_probs(home: str, away: str, strengths, mu_home=MU_HOME, mu_awa
     lamH = float(mu_home) * float(aH) * float(dA)
     lamA = float(mu_away) * float(aA) * float(dH)
 
-    # PMFs truncadas até gmax (rápido e suficiente para futebol)
-    pmfH = _poisson_pmf(lamH, gmax)
-    pmfA = _poisson_pmf(lamA, gmax)
-    cdfA = np.cumsum(pmfA)
-
-    # Empate: sum_k P_H(k) * P_A(k)
-    pE = float(np.dot(pmfH, pmfA))
-
-    # Mandante vence: sum_i P_H(i) * P_A(<= i-1)
-    cdfA_prev = np.concatenate(([0.0], cdfA[:-1]))
-    pH = float(np.dot(pmfH, cdfA_prev))
+    pH, pE, pA = poisson_probs(lamH, lamA, gmax)
+    return float(pH), float(pE), float(pA)
 
-    # Visitante vence: complemento
-    pA = 1.0 - pH - pE
-
-    # Saneamento numérico
-    pH = max(0.0, min(1.0, pH))
-    pE = max(0.0, min(1.0, pE))
-    pA = max(0.0, min(1.0, pA))
-
-    # Normaliza se houver drift numérico
-    s = pH + pE + pA
-    if s > 0:
-        pH, pE, pA = pH/s, pE/s, pA/s
+def dc_tau(lamH, lamA, rho):
+    """
+    Fatores de Dixon–Coles (..., 2, 2) para os placares 0x0, 0x1, 1x0 e 1x1:
+    rho < 0 aumenta 0x0/1x1 e reduz 0x1/1x0 (rho > 0, o contrário).
+    """
+    lamH, lamA = np.asarray(lamH, dtype=float), np.asarray(lamA, dtype=float)
+    return np.stack([np.stack([1.0 - lamH * lamA * rho, 1.0 + lamH * rho], axis=-1),
+                     np.stack([1.0 + lamA * rho, np.full_like(lamH * lamA, 1.0 - rho)], axis=-1)], axis=-2)
 
-    return pH, pE, pA
+def score_grid(lamH, lamA, gmax=10, rho=0.0):
+    """
+    Grade conjunta (..., gmax+1, gmax+1) de placares: [i, j] = P(mandante i, visitante j).
+    Com rho != 0, aplica a correção de Dixon–Coles nos placares baixos e renormaliza.
+    """
+    g = _poisson_pmf(lamH, gmax)[..., :, None] * _poisson_pmf(lamA, gmax)[..., None, :]
+    if rho:
+        g[..., :2, :2] *= dc_tau(lamH, lamA, rho)
+        g /= g.sum(axis=(-2, -1), keepdims=True)
+    return g
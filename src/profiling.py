@@ -0,0 +1,68 @@
+# src/profiling.py
+import time
+from contextlib import nullcontext
+
+# Medição por fase (tempo de parede + número de chamadas). Desligada, o
+# simulador usa NULL_TIMER: cada fase custa só uma chamada que devolve um
+# nullcontext já pronto.
+
+class PhaseTimer:
+    def __init__(self):
+        self.wall = {}
+        self.calls = {}
+        self.n_sims = 0
+
+    def add(self, name, seconds, calls=1):
+        self.wall[name] = self.wall.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def report(self):
+        """Dict serializável em JSON: fases, simulações e simulações por segundo."""
+        sim_s = self.wall.get("simulate", 0.0)
+        return {
+            "phases": {k: {"wall_s": round(v, 6), "calls": self.calls[k]}
+                       for k, v in sorted(self.wall.items(), key=lambda kv: -kv[1])},
+            "n_sims": int(self.n_sims),
+            "sims_per_s": round(self.n_sims / sim_s, 1) if sim_s > 0 else None,
+        }
+
+class _Phase:
+    __slots__ = ("timer", "name", "t0")
+
+    def __init__(self, timer, name):
+        self.timer, self.name = timer, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.t0)
+        return False
+
+class _NullTimer:
+    _ctx = nullcontext()
+
+    def add(self, name, seconds, calls=1):
+        pass
+
+    def phase(self, name):
+        return self._ctx
+
+NULL_TIMER = _NullTimer()
+
+class Laps:
+    """Cronômetro de voltas para dentro dos lotes: laps('fase') soma o tempo desde a última volta."""
+    def __init__(self):
+        self.t = time.perf_counter()
+        self.d = {}
+
+    def __call__(self, name):
+        t = time.perf_counter()
+        self.d[name] = self.d.get(name, 0.0) + t - self.t
+        self.t = t
+
+def no_laps(name):
+    pass
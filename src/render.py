@@ -0,0 +1,124 @@
+# src/render.py
+import numpy as np
+from pathlib import Path
+
+# Figuras a partir das contagens agregadas (times × posições), sem re-simular.
+# Backend sempre não interativo (Agg). Cada figura é um job (tipo, argumentos),
+# o que permite renderizá-las em paralelo em processos separados. As contagens
+# ficam em outputs/counts_{method}.npz, para renderizar depois:
+#   python main.py --render-only --method all --charts all --workers 4
+#
+# Tipos de figura (--charts):
+#   team  -> santos_positions_{method}.png (histograma do time; o padrão)
+#   all   -> + heatmap_{method}.png (times × posições) e panel_{method}.png
+#            (um pequeno histograma por time)
+
+def pyplot():
+    """matplotlib.pyplot com o backend Agg (sem janela; pode rodar em worker/servidor)."""
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+    import matplotlib.pyplot as plt
+    return plt
+
+def save_counts(path, teams, counts, n_sims):
+    np.savez(path, teams=np.array(teams, dtype=str), counts=counts, n_sims=n_sims)
+
+def load_counts(path):
+    """(teams, counts, n_sims) gravados por save_counts."""
+    z = np.load(path, allow_pickle=False)
+    return z["teams"].tolist(), z["counts"], int(z["n_sims"])
+
+def team_hist(path, teams, counts, n_sims, k, method):
+    plt = pyplot()
+    T = len(teams)
+    fig = plt.figure()
+    plt.bar(np.arange(1, T + 1), counts[k], width=1.0)
+    plt.title(f"{teams[k]} — {method}")
+    fig.savefig(path, dpi=140)
+    plt.close(fig)
+
+def heatmap(path, teams, counts, n_sims, k, method):
+    """Mapa de calor times × posições, times ordenados pela posição média."""
+    plt = pyplot()
+    T = len(teams)
+    prob = counts / max(n_sims, 1)
+    order = np.argsort(prob @ np.arange(1, T + 1), kind="stable")
+    fig, ax = plt.subplots(figsize=(9, 7))
+    im = ax.imshow(prob[order], aspect="auto", cmap="viridis", extent=(0.5, T + 0.5, T - 0.5, -0.5))
+    ax.set_yticks(np.arange(T))
+    ax.set_yticklabels([teams[i] for i in order], fontsize=8)
+    for lab, i in zip(ax.get_yticklabels(), order):
+        if i == k:
+            lab.set_fontweight("bold")
+    ax.set_xticks(np.arange(1, T + 1))
+    for x in (6.5, 12.5, T - 3.5):  # Libertadores | Sul-Americana | rebaixamento
+        ax.axvline(x, color="white", lw=0.8)
+    ax.set_xlabel("Posição")
+    ax.set_title(f"Distribuição de posições — {method} ({n_sims} simulações)")
+    fig.colorbar(im, ax=ax, label="Probabilidade")
+    fig.tight_layout()
+    fig.savefig(path, dpi=140)
+    plt.close(fig)
+
+def panel(path, teams, counts, n_sims, k, method, ncols=5):
+    """Pequenos múltiplos: histograma de posições de cada time, mesmos eixos, rebaixamento em vermelho."""
+    plt = pyplot()
+    T = len(teams)
+    prob = counts / max(n_sims, 1)
+    order = np.argsort(prob @ np.arange(1, T + 1), kind="stable")
+    nrows = -(-T // ncols)
+    fig, axes = plt.subplots(nrows, ncols, figsize=(2.6 * ncols, 1.9 * nrows), sharex=True, sharey=True)
+    colors = np.where(np.arange(1, T + 1) > T - 4, "tab:red", "tab:blue")
+    x = np.arange(1, T + 1)
+    for ax, i in zip(axes.flat, order):
+        ax.bar(x, prob[i], width=1.0, color=colors)
+        ax.set_title(f"{teams[i]}  ({100 * prob[i, T - 4:].sum():.0f}% reb.)", fontsize=8,
+                     fontweight="bold" if i == k else "normal")
+        ax.tick_params(labelsize=7)
+    # poucos ticks fixos (eixos compartilhados): o custo do painel está quase todo nos ticks
+    ax.set_xticks([1, 6, 12, T - 3, T])
+    ax.set_yticks(np.linspace(0, round(float(prob.max()), 1) or 0.1, 3))
+    for ax in axes.flat[T:]:
+        ax.set_visible(False)
+    fig.suptitle(f"Posições finais por time — {method}")
+    fig.subplots_adjust(left=0.04, right=0.99, bottom=0.05, top=0.91, wspace=0.08, hspace=0.45)  # tight_layout é caro com 20 eixos
+    fig.savefig(path, dpi=110)
+    plt.close(fig)
+
+FIGURES = {"team": team_hist, "heatmap": heatmap, "panel": panel}
+
+def figure_jobs(outdir, teams, counts, n_sims, k, method, charts="team"):
+    """Jobs (tipo, argumentos) das figuras de um método para o nível 'charts' (none|team|all)."""
+    if charts == "none":
+        return []
+    names = {"team": f"santos_positions_{method}.png", "heatmap": f"heatmap_{method}.png",
+             "panel": f"panel_{method}.png"}
+    kinds = ["team"] if charts == "team" else ["team", "heatmap", "panel"]
+    return [(kind, (f"{outdir}/{names[kind]}", teams, counts, n_sims, k, method)) for kind in kinds]
+
+def _render(kind, args):
+    FIGURES[kind](*args)
+    return args[0]
+
+def render_jobs(jobs, workers=1):
+    """Renderiza os jobs (em série ou num pool de processos) -> caminhos gravados."""
+    if workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+            return list(ex.map(_render, *zip(*jobs)))
+    return [_render(kind, args) for kind, args in jobs]
+
+def render_saved(outdir, methods, team, charts="all", workers=1):
+    """Figuras a partir de outdir/counts_{method}.npz, sem simular. -> caminhos gravados."""
+    from .league import normalize_name
+    jobs = []
+    for m in methods:
+        path = Path(outdir) / f"counts_{m}.npz"
+        if not path.exists():
+            raise FileNotFoundError(f"{path} não existe: rode a simulação de '{m}' antes")
+        teams, counts, n = load_counts(path)
+        name = normalize_name(team)
+        if name not in teams:
+            raise KeyError(f"Time '{team}' não encontrado em {path}")
+        jobs += figure_jobs(outdir, teams, counts, n, teams.index(name), m, charts)
+    return render_jobs(jobs, workers)
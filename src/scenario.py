@@ -0,0 +1,71 @@
+# src/scenario.py
+import numpy as np
+from dataclasses import dataclass
+from .engine import position_counts
+
+# Resultados simulados guardados de forma compacta: 2 bits por jogo
+# (0=mandante, 1=empate, 2=visitante), 4 jogos por byte.
+CODES = {"H": 0, "E": 1, "A": 2}
+
+def outcome_column(packed, j):
+    """Códigos (n,) do jogo j a partir do array empacotado."""
+    return (packed[:, j // 4] >> (2 * (j % 4))) & 3
+
+def parse_scenario(spec):
+    """
+    "Santos x Vasco da Gama=H; Sport x Bahia=A" -> {("Santos", "Vasco da Gama"): "H", ...}.
+    Resultado: H (mandante vence), E (empate) ou A (visitante vence).
+    """
+    fixed = {}
+    for item in filter(None, (x.strip() for x in spec.split(";"))):
+        game, res = item.rsplit("=", 1)
+        home, away = (x.strip() for x in game.split(" x ", 1))
+        fixed[(home, away)] = res.strip().upper()
+    return fixed
+
+@dataclass
+class OutcomeStore:
+    teams: list
+    home: np.ndarray        # índices dos jogos restantes (mesma ordem de remaining_matches)
+    away: np.ndarray
+    packed: np.ndarray      # (sims × ceil(jogos/4)) uint8
+    positions: np.ndarray   # (sims × times) uint8, posição final de cada time
+    key: str = ""           # chave da simulação que gerou (SeasonSimulator._cache_key)
+
+    @property
+    def n_sims(self):
+        return self.packed.shape[0]
+
+    def fixture_codes(self, fixed):
+        """{(mandante, visitante): 'H'|'E'|'A'} -> {índice do jogo: código}."""
+        idx = {t: i for i, t in enumerate(self.teams)}
+        games = {(int(h), int(a)): j for j, (h, a) in enumerate(zip(self.home, self.away))}
+        out = {}
+        for (h, a), res in fixed.items():
+            if res not in CODES:
+                raise ValueError(f"Resultado inválido '{res}' para {h} x {a}: use H, E ou A")
+            key = (idx.get(h, -1), idx.get(a, -1))
+            if key not in games:
+                raise KeyError(f"Jogo '{h} x {a}' não está em remaining_matches")
+            out[games[key]] = CODES[res]
+        return out
+
+    def condition(self, fixed):
+        """
+        Filtra as temporadas guardadas compatíveis com o cenário e devolve
+        (contagens times × posições, temporadas compatíveis).
+        """
+        mask = np.ones(self.n_sims, dtype=bool)
+        for j, c in self.fixture_codes(fixed).items():
+            mask &= outcome_column(self.packed, j) == c
+        return position_counts(self.positions[mask].astype(np.intp)), int(mask.sum())
+
+    def save(self, path):
+        np.savez_compressed(path, teams=np.array(self.teams), home=self.home, away=self.away,
+                            packed=self.packed, positions=self.positions, key=np.array(self.key))
+
+    @classmethod
+    def load(cls, path):
+        z = np.load(path, allow_pickle=False)
+        key = str(z["key"]) if "key" in z.files else ""
+        return cls(z["teams"].tolist(), z["home"], z["away"], z["packed"], z["positions"], key)
@@ -0,0 +1,251 @@
+# src/server.py
+import copy, json, os, socketserver, threading, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+from .simulator import SeasonSimulator, ZONES, METHODS
+from .league import normalize_name, source_stamp
+from .stats import wilson_ci
+from .exact import exact_table
+
+# Serviço de consultas de longa duração: a liga e as tabelas de probabilidades
+# de cada método ficam em memória (SeasonSimulator já preparado), as respostas
+# repetidas saem de um cache LRU, as requisições são atendidas por um pool de
+# threads e os dados são recarregados quando algum CSV de data/ muda. Na reta
+# final (até exact_max jogos), como em run(), a resposta é a distribuição exata
+# (src/exact.py): sims=0 e exact=true, a mesma para qualquer sims/seed.
+#   python main.py --serve --port 8765
+#   GET /simulate?team=Santos&method=elo&sims=20000&seed=42
+#   GET /health
+
+class LRU:
+    """Cache LRU com trava (acesso por várias threads) e contadores de acertos/faltas."""
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.data:
+                self.data.move_to_end(key)
+                self.hits += 1
+                return self.data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+class SimService:
+    """
+    Estado quente do serviço. 'paths' são os quatro CSVs (como no SeasonSimulator);
+    query(...) devolve o dict JSON da resposta.
+    """
+    def __init__(self, paths=None, shard_size=10000, cache_size=256, max_sims=1_000_000, scorelines=False,
+                 exact_max=20):
+        self.paths = dict(paths or {})
+        self.shard_size, self.max_sims, self.scorelines = shard_size, max_sims, scorelines
+        self.exact_max = exact_max
+        self.cache = LRU(cache_size)
+        self.lock = threading.Lock()
+        self.stamp, self.warm, self.loaded_at = None, {}, None
+        self.reload_if_changed()
+
+    def reload_if_changed(self):
+        """Recarrega liga e modelos se algum CSV mudou (mtime/tamanho); True se recarregou."""
+        p = SeasonSimulator(**self.paths)
+        stamp = source_stamp(p.current_table_path, p.remaining_matches_path, p.ratings_path, p.strengths_path)
+        if stamp == self.stamp:
+            return False
+        with self.lock:
+            if stamp == self.stamp:
+                return False
+            warm = {}
+            for m in METHODS:
+                sim = SeasonSimulator(m, **self.paths, shard_size=self.shard_size,
+                                      scorelines=self.scorelines, compute_only=True, exact_max=self.exact_max)
+                teams = sim._league()[0]
+                sim._prepare(teams[0])  # liga, modelo e tabela P (e alias de placares) em memória
+                warm[m] = sim
+            self.warm, self.stamp, self.loaded_at = warm, stamp, time.strftime("%Y-%m-%dT%H:%M:%S")
+            self.cache.clear()
+        return True
+
+    def _exact(self, method):
+        # matriz exata de todos os times (ExactTable, uma por método e liga), ou
+        # None fora de exact_max ou com estados demais (aí vale o Monte Carlo)
+        sim = self.warm[method]
+        teams, home, away, base, P = sim.prepared
+        if not sim._exact_applies(home):
+            return None, False
+        key = (self.stamp, method, "exact")
+        tab = self.cache.get(key)
+        if tab is not None:
+            return tab or None, True
+        tab = exact_table(P, home, away, base)
+        self.cache.put(key, tab or False)  # False: estados demais, não tenta de novo
+        return tab, False
+
+    def _counts(self, method, n_sims, seed):
+        # Accumulator (todos os times) de (método, sims, seed), do cache ou simulado
+        key = (self.stamp, method, n_sims, seed)
+        acc = self.cache.get(key)
+        if acc is not None:
+            return acc, True
+        sim = copy.copy(self.warm[method])  # mesmo estado preparado, seed própria
+        sim.random_seed = seed
+        teams, home, away, base, P = sim.prepared
+        acc = sim._simulate(P, home, away, base, n_sims)
+        self.cache.put(key, acc)
+        return acc, False
+
+    def query(self, team="Santos", method="elo", sims=20000, seed=42):
+        t0 = time.perf_counter()
+        self.reload_if_changed()
+        if method not in self.warm:
+            raise ValueError(f"Método '{method}' inválido: use {', '.join(METHODS)}")
+        sims, seed = int(sims), int(seed)
+        if not 0 < sims <= self.max_sims:
+            raise ValueError(f"sims deve estar entre 1 e {self.max_sims}")
+        sim = self.warm[method]
+        teams = sim.prepared[0]
+        name = normalize_name(team)
+        if name not in teams:
+            raise KeyError(f"Time '{team}' não encontrado. Disponíveis: {', '.join(sorted(teams))}")
+        k = teams.index(name)
+        acc, cached = self._exact(method)
+        exact = acc is not None
+        if not exact:
+            acc, cached = self._counts(method, sims, seed)
+        T, n = len(teams), acc.n
+        pr = float(acc.counts[k, :T - 4].sum() / n)
+        lo, hi = (pr, pr) if exact else wilson_ci(int(acc.counts[k, :T - 4].sum()), n)
+        return {
+            "team": name, "method": method, "sims": 0 if exact else n, "seed": seed,
+            "not_relegated_prob": pr,
+            "ci95": [round(float(lo), 5), round(float(hi), 5)],
+            "zones": {z: float(acc.counts[k, a - 1:b].sum() / n) for z, (a, b) in ZONES.items()},
+            "positions": (acc.counts[k] / n).round(6).tolist(),
+            "points_mean": round(float(acc.points.mean[k]), 3),
+            "exact": exact,
+            "cached": cached,
+            "elapsed_ms": round(1e3 * (time.perf_counter() - t0), 2),
+        }
+
+    def health(self):
+        return {"status": "ok", "loaded_at": self.loaded_at, "methods": list(self.warm),
+                "teams": len(self.warm[METHODS[0]].prepared[0]),
+                "cache": {"size": len(self.cache.data), "max": self.cache.maxsize,
+                          "hits": self.cache.hits, "misses": self.cache.misses}}
+
+class _Handler(BaseHTTPRequestHandler):
+    service = None  # SimService, definido em make_server
+    protocol_version = "HTTP/1.1"
+    # keep-alive: conexão ociosa por mais que isso é fechada e libera a thread do pool
+    timeout = 5.0
+
+    def _send(self, code, obj):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _params(self):
+        u = urlparse(self.path)
+        q = {k: v[-1] for k, v in parse_qs(u.query).items()}
+        n = int(self.headers.get("Content-Length") or 0)
+        if n:
+            q.update(json.loads(self.rfile.read(n) or b"{}"))
+        return u.path, q
+
+    def _route(self):
+        try:
+            path, q = self._params()
+            if path == "/health":
+                return self._send(200, self.service.health())
+            if path == "/simulate":
+                allowed = {"team", "method", "sims", "seed"}
+                return self._send(200, self.service.query(**{k: v for k, v in q.items() if k in allowed}))
+            self._send(404, {"error": f"rota desconhecida: {path}"})
+        except KeyError as e:
+            self._send(404, {"error": str(e.args[0]) if e.args else str(e)})
+        except (ValueError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+
+    do_GET = do_POST = _route
+
+    def address_string(self):
+        # socket Unix: client_address é ''
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, fmt, *args):
+        pass
+
+class _PoolMixIn:
+    # atende cada conexão num pool fixo de threads (em vez de uma thread nova por conexão)
+    workers = 4
+
+    def process_request(self, request, client_address):
+        if not hasattr(self, "_pool"):
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._pool.submit(self._work, request, client_address)
+
+    def _work(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        if hasattr(self, "_pool"):
+            self._pool.shutdown(wait=True)
+
+class PoolHTTPServer(_PoolMixIn, HTTPServer):
+    daemon_threads = True
+
+class PoolUnixHTTPServer(_PoolMixIn, socketserver.UnixStreamServer):
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = "unix", 0
+
+def make_server(service, host="127.0.0.1", port=8765, workers=4, unix_socket=None, idle_timeout=5.0):
+    """
+    Servidor HTTP (TCP ou socket Unix) com pool de 'workers' threads sobre 'service'.
+    Conexões keep-alive ociosas por idle_timeout segundos são fechadas.
+    """
+    handler = type("Handler", (_Handler,), {"service": service, "timeout": idle_timeout})
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        srv = PoolUnixHTTPServer(unix_socket, handler)
+    else:
+        srv = PoolHTTPServer((host, port), handler)
+    srv.workers = workers
+    return srv
+
+def serve(service, host="127.0.0.1", port=8765, workers=4, unix_socket=None):
+    srv = make_server(service, host, port, workers, unix_socket)
+    where = unix_socket or f"http://{host}:{srv.server_port}"
+    print(f"Servindo em {where} (Ctrl+C para parar)", flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
@@ -1,26 +1,73 @@
-import numpy as np, pandas as pd
+import numpy as np
+import sys, time
+from itertools import islice
 from dataclasses import dataclass
 from pathlib import Path
-import matplotlib.pyplot as plt
-from .elo import elo_probabilities
-from .poisson import poisson_match_probs
-
-NAME_FIX = {
-    "Atlético": "Atlético Mineiro",
-    "Atletico Mineiro": "Atlético Mineiro",
-    "RB Bragantino": "Red Bull Bragantino",
-    "Bragantino": "Red Bull Bragantino",
-    "Sao Paulo": "São Paulo",
-    "Gremio": "Grêmio",
+from .models import make_model, score_grid
+from .engine import Chunk, shard_seeds, simulate_shard, simulate_crn_shard, score_alias, simulate_scores_shard, simulate_trajectory_shard
+from .stats import Accumulator, binom_se, wilson_ci
+from . import importance
+from .scenario import OutcomeStore
+from .cache import ResultCache, cache_key
+from .profiling import NULL_TIMER
+from .league import NAME_FIX, normalize_name, load_league
+from .sweep import grid_models, simulate_sweep_shard
+from .render import figure_jobs, render_jobs, save_counts, pyplot
+from .exact import solve, exact_table
+from .clinch import best_position, worst_position, position_bounds, ranking_blocks
+from . import elo, poisson
+
+# pandas e matplotlib são importados só onde são usados (leitura dos CSVs,
+# matrizes e figuras): o caminho só-cálculo com snapshot (src/league.py)
+# carrega apenas numpy.
+
+METHODS = ["baseline", "elo", "poisson"]
+
+# Zonas da tabela (posições inclusivas)
+ZONES = {
+    "Titulo": (1, 1),
+    "Libertadores": (1, 6),
+    "SulAmericana": (7, 12),
+    "Rebaixamento": (17, 20),
 }
 
-def normalize_name(s: str) -> str:
-    if not isinstance(s, str):
-        s = str(s)
-    s = s.replace("\xa0", " ").strip()
-    while "  " in s:
-        s = s.replace("  ", " ")
-    return NAME_FIX.get(s, s)
+def position_matrix(teams,counts,n_sims,points=None,exact=False):
+    """
+    DataFrame com uma linha por time: Sims, probabilidade de cada posição
+    (colunas '1'..'20') e das zonas em ZONES; com 'points' (RunningMoments),
+    também média e desvio-padrão dos pontos finais. Com exact (counts já são
+    probabilidades exatas), Sims=0 e erros-padrão 0.
+    """
+    import pandas as pd
+    T=len(teams)
+    prob=counts/max(n_sims,1)
+    mat=pd.DataFrame(prob,columns=[str(p) for p in range(1,T+1)])
+    mat.insert(0,'Sims',int(n_sims))
+    mat.insert(0,'Team',teams)
+    for z,(lo,hi) in ZONES.items():
+        mat[z]=prob[:,lo-1:hi].sum(axis=1)
+    for z,(lo,hi) in ZONES.items():
+        mat[f'{z}_SE']=0.0 if exact else binom_se(counts[:,lo-1:hi].sum(axis=1),n_sims)
+    if exact:
+        mat['Sims']=0
+    mat['PosMedia']=prob@np.arange(1,T+1)
+    if points is not None:
+        mat['PtsMedia']=points.mean
+        mat['PtsDP']=points.sd
+    return mat
+
+def read_matrix(outdir,method):
+    """
+    positions_matrix_{method} gravada em outdir (.csv ou .parquet; havendo as duas,
+    a mais recente), indexada por Team. FileNotFoundError se não houver nenhuma.
+    """
+    import pandas as pd
+    found=[p for p in (Path(outdir)/f'positions_matrix_{method}.{ext}' for ext in ('csv','parquet')) if p.exists()]
+    if not found:
+        raise FileNotFoundError(f"positions_matrix_{method} (.csv ou .parquet) não existe em {outdir}")
+    path=max(found,key=lambda p:p.stat().st_mtime)
+    mat=pd.read_parquet(path) if path.suffix=='.parquet' else pd.read_csv(path)
+    return mat.set_index('Team')
 
 @dataclass
 class SeasonSimulator:
@@ -31,147 +78,522 @@ class SeasonSimulator:
     strengths_path:str='data/team_strengths.csv'
     outdir:str='outputs'
     random_seed:int=42
+    shard_size:int=10000
+    workers:int=1
+    matrix_format:str='csv'
+    scorelines:bool=False
+    keep_outcomes:bool=False
+    cache_dir:str=None
+    progress:bool=False
+    compute_only:bool=False   # só a probabilidade: sem figuras nem arquivos de saída
+    timer:object=None   # PhaseTimer opcional (tempo por fase; ver --profile)
+    elo_k:float=None    # método elo com Elo dinâmico (fator K); None = ratings fixos
+    charts:str='team'   # figuras: none | team (histograma do time) | all (+ mapa de calor e painel)
+    exact_max:int=20    # até quantos jogos restantes run()/run_all() usam a solução exata (0 = nunca)
+
+    def _check_inputs(self,method):
+        # elo/poisson precisam dos ratings/forças: arquivo presente mas ilegível é
+        # erro; arquivo ausente cai no baseline (make_model), com aviso
+        src,path={'elo':('ratings',self.ratings_path),'poisson':('strengths',self.strengths_path)}.get(method,(None,None))
+        if src is None:
+            return
+        issue=(self.league.issues or {}).get(src)
+        if issue:
+            raise ValueError(f"--method {method}: {issue}")
+        if not (self.r_elo if src=='ratings' else self.str_lookup):
+            print(f"Aviso: {path} não encontrado; --method {method} usa as probabilidades do baseline",file=sys.stderr)
+
+    def _model(self,teams):
+        # modelo vetorizado (interface probs(home_idx, away_idx) -> (n, 3))
+        self._check_inputs(self.method)
+        return make_model(self.method,teams,self.r_elo,self.str_lookup,self.elo_k,self.league.rho)
+
+    def _league(self):
+        # liga compilada (src/league.py): snapshot .npz em dia ou CSVs recompilados
+        lg=load_league(self.current_table_path,self.remaining_matches_path,self.ratings_path,self.strengths_path)
+        self.league=lg
+        self.r_elo,self.str_lookup=lg.r_elo,lg.str_lookup
+        self.rounds,self.stats0=lg.rounds,lg.stats0
+        return lg.teams,lg.index,lg.home,lg.away,lg.points
+
+    def _prepare(self,team):
+        # carrega os dados, compila em arrays e monta a tabela (jogos × 3) de
+        # probabilidades — uma chamada vetorizada por execução
+        tm=self.timer or NULL_TIMER
+        with tm.phase('load'):
+            teams,idx,home,away,base=self._league()
+        name=normalize_name(team)
+        if name not in idx:
+            disponiveis="', '".join(sorted(teams))
+            raise KeyError(
+                f"Time '{team}' não encontrado no resultado final da simulação."
+                f"Verifique a normalização dos nomes. Disponíveis: '{disponiveis}'"
+            )
+        with tm.phase('probs'):
+            model=self._model(teams)
+            P=model.probs(home,away)
+        # Elo dinâmico: cada temporada atualiza seus ratings rodada a rodada
+        self.dynamic=(model,self.rounds) if hasattr(model,'delta') else None
+        if self.dynamic and self.scorelines:
+            raise ValueError("Elo dinâmico (elo_k) ainda não suporta o modo com placares")
+        # modo com placares: tabelas de alias de placares por jogo, com as massas H/E/A de P
+        with tm.phase('score_tables'):
+            self.score_grid=score_grid(model,home,away) if self.scorelines else None
+            self.score_A=score_alias(P,self.score_grid) if self.scorelines else None
+        self.model=model
+        self.blocks=None if self._exact_applies(home) else self._ranking_blocks(home,away,base)
+        self.prepared=(teams,home,away,base,P)
+        return teams,home,away,base,P,idx[name]
+
+    def _map_shards(self,fn,args):
+        # resultados dos lotes, na ordem, em série ou num pool de processos;
+        # 'args' pode ser um gerador (é consumido aos poucos, uma onda por vez)
+        args=iter(args)
+        if self.workers>1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=self.workers) as ex:
+                # submete em ondas de `workers` lotes para poder parar cedo
+                while True:
+                    futs=[ex.submit(fn,*a) for a in islice(args,self.workers)]
+                    if not futs:
+                        break
+                    for f in futs:
+                        yield f.result()
+        else:
+            for a in args:
+                yield fn(*a)
+
+    def _shards(self,n_sims,n0=0):
+        # (tamanho, semente) dos lotes que cobrem as simulações [n0, n_sims), sob demanda
+        for i0 in range(n0,n_sims,self.shard_size):
+            k=i0//self.shard_size
+            yield min(self.shard_size,n_sims-i0),shard_seeds(self.random_seed,k,k+1)[0]
+
+    def _cache_key(self,P,home,away,base):
+        # tudo o que determina o resultado, inclusive as constantes dos modelos
+        consts={n:getattr(elo,n) for n in ("DEFAULT_ELO","HOME_ADV","GAMMA","BASE_DRAW",
+                "USE_DYNAMIC_DRAW","BETA","TAU","P_MIN","P_MAX")}
+        consts.update(MU_HOME=poisson.MU_HOME,MU_AWAY=poisson.MU_AWAY)
+        # Elo dinâmico percorre os jogos na ordem das rodadas: remarcar rodadas muda o resultado
+        extra={'rounds':self.rounds} if self.dynamic else {}
+        return cache_key(teams=self.prepared[0],points=base,stats0=self.stats0,home=home,away=away,
+                         method=self.method,model=self.model,consts=consts,P=P,
+                         scorelines=self.scorelines,seed=self.random_seed,shard_size=self.shard_size,**extra)
+
+    def _simulate(self,P,home,away,base,n_sims,stop=None,keep=False):
+        # Pipeline em lotes: gerador de lotes (shard_size temporadas, cada um com seu
+        # SeedSequence) -> Chunk de tamanho fixo -> Accumulator. A memória não cresce
+        # com n_sims, e o resultado depende só de (seed, shard_size), não dos workers.
+        # 'stop(acc)' é avaliado após cada lote, na ordem: permite parar antes de n_sims.
+        # Com keep=True, guarda também os resultados de cada temporada (OutcomeStore).
+        # Com cache_dir (e sem 'stop'), reaproveita execuções idênticas já guardadas e,
+        # se houver uma menor (múltipla de shard_size), só simula os lotes que faltam.
+        # Com timer, cada lote mede suas fases internas (sample/points/rank/summary),
+        # somadas aqui como 'shard.<fase>' (tempo de CPU dos workers, não de parede).
+        tm=self.timer or NULL_TIMER
+        timed=self.timer is not None
+        T=base.size
+        acc=Accumulator(T,ZONES)
+        kept=[]
+        names=['counts','points']+(['packed','positions'] if keep else [])
+        cache=key=None; n0=0
+        if self.cache_dir and stop is None:
+            with tm.phase('cache'):
+                cache=ResultCache(self.cache_dir); key=self._cache_key(P,home,away,base)
+                hit=cache.get(key,n_sims,names)
+                if hit is None:
+                    n0=cache.prefix(key,n_sims,self.shard_size,names)
+                    hit=cache.get(key,n0,names) if n0 else None
+            if hit is not None:
+                acc.update(Chunk(n0 or n_sims,hit['counts'],hit['points'][0],hit['points'][1],
+                                 hit.get('packed'),hit.get('positions')))
+                if keep:
+                    kept.append((hit['packed'],hit['positions']))
+                if n0==0:
+                    if keep:
+                        self.store=OutcomeStore(self.prepared[0],home,away,*kept[0],key=key)
+                    return acc
+
+        if self.scorelines:
+            fn=simulate_scores_shard
+            A=self.score_A if P is self.prepared[4] else score_alias(P,self.score_grid)
+            args=((A,home,away,base,self.stats0,n,sd,keep,timed) for n,sd in self._shards(n_sims,n0))
+        else:
+            fn=simulate_shard
+            args=((P,home,away,base,n,sd,keep,timed,self.dynamic,self.blocks) for n,sd in self._shards(n_sims,n0))
+
+        t0=time.perf_counter()
+        for c in self._map_shards(fn,args):
+            acc.update(c)
+            if c.timings:
+                for f,dt in c.timings.items():
+                    tm.add('shard.'+f,dt)
+            if keep:
+                kept.append((c.packed,c.positions))
+            if self.progress:
+                dt=time.perf_counter()-t0
+                print(f'[{self.method}] {acc.n}/{n_sims} simulações ({100*acc.n/max(n_sims,1):.1f}%)'
+                      f' — {(acc.n-n0)/max(dt,1e-9):,.0f} sims/s',file=sys.stderr,flush=True)
+            if stop is not None and stop(acc):
+                break
+        tm.add('simulate',time.perf_counter()-t0)
+        if timed:
+            self.timer.n_sims+=acc.n-n0
+        if keep:
+            self.store=OutcomeStore(self.prepared[0],home,away,
+                                    np.concatenate([p for p,_ in kept]),np.concatenate([q for _,q in kept]),
+                                    key=key or self._cache_key(P,home,away,base))
+        if cache is not None:
+            arrays={'counts':acc.counts,'points':np.stack([acc.points.mean,acc.points.m2])}
+            if keep:
+                arrays.update(packed=self.store.packed,positions=self.store.positions)
+            with tm.phase('cache'):
+                cache.put(key,acc.n,arrays,
+                          meta={'method':self.method,'seed':self.random_seed,'shard_size':self.shard_size,
+                                'scorelines':self.scorelines,'teams':self.prepared[0]})
+        return acc
+
+    def _write_outputs(self,teams,acc,k,method=None):
+        # matriz completa (times × posições) + zonas, para todos os clubes, e as
+        # contagens (counts_{method}.npz, para renderizar depois); devolve os jobs
+        # das figuras (src/render.py), renderizados por _render
+        import pandas as pd
+        tm=self.timer or NULL_TIMER
+        method=method or self.method
+        counts,n_sims,T=acc.counts,acc.n,len(teams)
+        with tm.phase('output_matrix'):
+            mat=position_matrix(teams,counts,n_sims,acc.points,getattr(acc,'exact',False))
+            mpath=f'{self.outdir}/positions_matrix_{method}.{self.matrix_format}'
+            if self.matrix_format=='parquet':
+                mat.to_parquet(mpath,index=False)
+            else:
+                mat.to_csv(mpath,index=False)
+
+            save_counts(f'{self.outdir}/counts_{method}.npz',teams,counts,n_sims)
+
+        #CSV (distribuição de posições)
+        with tm.phase('output_csv'):
+            dist=pd.DataFrame({'Position':np.arange(1,T+1),'Count':counts[k]})
+            dist["Probability"]=dist['Count']/max(n_sims,1)
+            dist.to_csv(f'{self.outdir}/santos_positions_{method}.csv',index=False)
+        return figure_jobs(self.outdir,teams,counts,n_sims,k,method,self.charts)
+
+    def _exact_applies(self,home):
+        # a solução exata (_exact) é tentada antes do Monte Carlo
+        return not (home.size>self.exact_max or self.scorelines or self.dynamic or self.keep_outcomes)
 
-    def _load(self):
-        t = pd.read_csv(self.current_table_path)
-        m = pd.read_csv(self.remaining_matches_path)
-
-        # Padroniza nomes em current_table e remaining_matches
-        m.columns = [c.strip().lower() for c in m.columns]
-        t["Team"] = t["Team"].map(normalize_name)
-        for c in ("home", "away"):
-            if c in m.columns:
-                m[c] = m[c].map(normalize_name)
-
-        # (opcional) converte numéricos
-        if "Points" in t.columns:
-            t["Points"] = pd.to_numeric(t["Points"], errors="raise")
-        if "Played" in t.columns:
-            t["Played"] = pd.to_numeric(t["Played"], errors="raise")
-
-        self.r_elo = None
-        # Carrega ratings e strengths (se existirem), já com strip aplicado
-        try:
-            r = pd.read_csv(self.ratings_path)
-            if "Team" in r.columns:
-                r["Team"] = r["Team"].map(normalize_name)
-            if "Elo" in r.columns:
-                r["Elo"] = pd.to_numeric(r["Elo"], errors="coerce")
-                self.r_elo = {row["Team"]: float(row["Elo"]) for _, row in r.dropna(subset=["Elo"]).iterrows()}
+    def _ranking_blocks(self,home,away,base):
+        # Garantias por fluxo máximo (src/clinch.py) para o Monte Carlo da reta
+        # final: times com faixa de posições já fechada são ordenados à parte (ou
+        # nem são ordenados) em cada temporada. Com mais de 2T jogos restantes
+        # nenhum corte deixa blocos pequenos o bastante, e nem se calcula. Na
+        # prática entra quando o Monte Carlo roda no fim: Elo dinâmico,
+        # keep_outcomes/what-if, exact_max=0 ou estados demais no exato.
+        if self.scorelines or home.size>2*base.size:
+            return None
+        with (self.timer or NULL_TIMER).phase('clinch'):
+            return ranking_blocks(position_bounds(base,home,away)[1])
+
+    def _exact(self,home,away,base,P,k):
+        # Solução exata (src/exact.py) quando restam até exact_max jogos, com
+        # probabilidades fixas e desempate por sorteio. Só-cálculo: apenas a
+        # faixa 1..T-4 de k, podando os ramos já decididos; senão, a matriz exata
+        # de todos os times. -> (prob. de k não cair, ExactTable ou None), ou None
+        # (fora do limite ou estados demais: segue o Monte Carlo)
+        if not self._exact_applies(home):
+            return None
+        T=base.size
+        with (self.timer or NULL_TIMER).phase('exact'):
+            if self.compute_only:
+                r=solve(P,home,away,base,k,np.array([0,T-4,T]))
+                ex=None if r is None else (float(r.bands[0]),None)
             else:
-                r = None
-        except Exception:
-            r = None
-        # ---- Forças (Poisson) → dict {Team: (a, d)}
-        self.str_lookup = None
-        try:
-            s = pd.read_csv(self.strengths_path)
-            if "Team" in s.columns:
-                s["Team"] = s["Team"].map(normalize_name)
-            # monta o lookup apenas uma vez; a função _as_lookup aceita DF ou dict
-            from .poisson import as_lookup
-            self.str_lookup = as_lookup(s)
-        except Exception:
-            s = None
-            self.str_lookup = None
-
-        # Checagem preventiva: todo time citado em m deve existir em t
-        missing = (set(m["home"]) | set(m["away"])) - set(t["Team"])
-        if missing:
-            raise KeyError(f"Times em remaining_matches sem correspondência em current_table: {sorted(missing)}")
-
-        return t, m, r, s
-
-    def _baseline(self,diff,base_draw=0.28):
-        pE=float(np.clip(base_draw+0.10*np.exp(-abs(diff)/100.0),0.18,0.36))
-        dec=1-pE; pH_no=1/(1+np.exp(-diff/150.0)); pH=dec*pH_no; pA=dec*(1-pH_no)
-        return float(pH),float(pE),float(pA)
-    
-    def _probs(self,home,away,r,stren):
-        # Elo: use o lookup (dict) se existir; senão, o DataFrame r
-        if self.method=='elo' and (self.r_elo is not None or r is not None):
-            src = self.r_elo if isinstance(self.r_elo, dict) and self.r_elo else r
-            return elo_probabilities(home,away,src)
-        
-        # Poisson: use o lookup (dict) se existir; senão, o DataFrame s (stren)
-        if self.method=='poisson' and (self.str_lookup is not None or stren is not None):
-            src = self.str_lookup if isinstance(self.str_lookup, dict) and self.str_lookup else stren
-            return poisson_match_probs(home,away,src)
-        
-        #Baseline com ajuste por Elo se tivermos o dict (fallback)
-        diff=50.0
-        if isinstance(self.r_elo, dict) and self.r_elo:
-            Rh=float(self.r_elo.get(home,1500.0))
-            Ra=float(self.r_elo.get(away,1500.0))
-            diff=(Rh+50.0)-Ra
-        return self._baseline(diff)
-    
-    def _once(self,t,m,r,s,rng):
-        # pontos em dict -> acesso 0(1)
-        pts=dict(zip(t['Team'],t['Points'].astype(float)))
-        #itertuples é mais rápido que iterrows
-        for home,away in m[["home","away"]].itertuples(index=False, name=None):
-            pH,pE,pA=self._probs(home,away,r,s)
-            o = rng.choice(("H", "E", "A"), p=[pH, pE, pA])
-            if o=="H":
-                pts[home]=pts.get(home,0.0)+3.0
-            elif o=="E":
-                pts[home]=pts.get(home,0.0)+1.0
-                pts[away]=pts.get(away,0.0)+1.0
-            else: pts[away]=pts.get(away,0.0)+3.0
-
-        # volta para DataFrame com desempate aleatório
-        fin = pd.DataFrame({"Team": list(pts.keys()), "Points": list(pts.values())})
-        fin["r"] = rng.random(len(fin))
-        fin = fin.sort_values(["Points", "r"], ascending=[False, False]).drop(columns=["r"]).reset_index(drop=True)
-        fin["Pos"] = np.arange(1, len(fin) + 1)
-        return fin
-
-    def run(self,n_sims,santos_name='Santos'):
+                tab=exact_table(P,home,away,base)
+                ex=None if tab is None else (float(tab.counts[k,:T-4].sum()),tab)
+        if ex is None and self.blocks is None:
+            self.blocks=self._ranking_blocks(home,away,base)
+        return ex
+
+    def _clinched(self,k):
+        # Só-cálculo: zona de k já decidida pelas garantias de src/clinch.py
+        # dispensa simular -> 1.0 (salvo), 0.0 (rebaixado) ou None
+        if not self.compute_only or self.keep_outcomes:
+            return None
+        teams,home,away,base,P=self.prepared
+        T=base.size
+        with (self.timer or NULL_TIMER).phase('clinch'):
+            if worst_position(base,home,away,k)<=T-4:
+                return 1.0
+            return 0.0 if best_position(base,home,away,k)>T-4 else None
+
+    @staticmethod
+    def _exact_result(pr):
+        return {'santos_not_relegated_prob':pr,'n_sims':0,'ci95':(round(pr,5),round(pr,5)),'exact':True}
+
+    def _render(self,jobs):
+        # figuras em processos separados quando workers > 1 (backend Agg)
+        with (self.timer or NULL_TIMER).phase('plot'):
+            render_jobs(jobs,self.workers)
+
+    def run(self,n_sims,santos_name='Santos',target_se=None,track_all=False):
         #Executa n_sims temporadas a partir da tabela corrente 
-        # e dos jogos restantes.
+        # e dos jogos restantes, em lotes de `shard_size` temporadas vetorizadas
+        # (distribuídos entre `workers` processos quando workers > 1).
+        #Com target_se, n_sims vira teto: para assim que o erro-padrão de
+        # santos_not_relegated_prob (e, com track_all, das zonas de todos os times)
+        # ficar <= target_se.
         #Salva:
         #outputs/santos_positions_{method}.png (histograma das posições simuladas)
         #outputs/santos_positions_{method}.csv (distribuição de posições)
+        #outputs/positions_matrix_{method}.csv (ou .parquet; times × posições + zonas, todos os clubes)
+        #outputs/counts_{method}.npz (contagens times × posições, para --render-only)
+        #outputs/heatmap_{method}.png e panel_{method}.png (com charts='all')
+        #outputs/outcomes_{method}.npz (com keep_outcomes: resultados de cada temporada)
+        #Com compute_only, nada disso é gravado (nem importado: pandas/matplotlib),
+        # exceto outcomes_{method}.npz quando keep_outcomes.
+        #Com até exact_max jogos restantes, o resultado é exato (enumeração, sem
+        # sorteio): n_sims=0, 'exact': True e as matrizes trazem probabilidades exatas.
+        # Idem no só-cálculo quando o time já está matematicamente salvo ou rebaixado.
         #Retorna:
-            #{'santos_not_relegated_prob': <probabilidade de ficar entre 1..16>}
+            #{'santos_not_relegated_prob': <probabilidade de ficar entre 1..16>,
+            # 'n_sims': <simulações usadas>, 'ci95': <IC de Wilson 95%>}
         #garante pasta de saída       
+        if not self.compute_only or self.keep_outcomes:
+            Path(self.outdir).mkdir(parents=True,exist_ok=True)
+
+        teams,home,away,base,P,k=self._prepare(santos_name)
+        cl=self._clinched(k)
+        if cl is not None:
+            return self._exact_result(cl)
+        ex=self._exact(home,away,base,P,k)
+        if ex is not None:
+            if not self.compute_only:
+                self._render(self._write_outputs(teams,ex[1],k))
+            return self._exact_result(ex[0])
+
+        T=base.size
+        stop=None
+        if target_se is not None:
+            def stop(acc):
+                se=binom_se(acc.counts[k,:T-4].sum(),acc.n)
+                if track_all:
+                    se=max(se,binom_se(acc.zone_counts,acc.n).max())
+                return se<=target_se
+        acc=self._simulate(P,home,away,base,n_sims,stop,self.keep_outcomes)
+        counts,n_sims=acc.counts,acc.n
+        if self.keep_outcomes:
+            self.store.save(f'{self.outdir}/outcomes_{self.method}.npz')
+        safe=int(counts[k,:T-4].sum())
+        pr=safe/n_sims if n_sims else 0.0
+        lo,hi=wilson_ci(safe,n_sims)
+
+        if not self.compute_only:
+            self._render(self._write_outputs(teams,acc,k))
+
+        return {'santos_not_relegated_prob': float(pr),
+                'n_sims': int(n_sims),
+                'ci95': (round(float(lo),5),round(float(hi),5))}
+
+    def run_all(self,n_sims,santos_name='Santos'):
+        #Os três métodos (METHODS) numa execução só: dados carregados uma vez e, em
+        # cada lote, os mesmos uniformes de resultados e desempates para todos
+        # (números aleatórios comuns) — as diferenças entre modelos não são ruído
+        # de amostragem. Cada método dá exatamente o que run() daria com a mesma seed.
+        #Salva as saídas de run() de cada método.
+        #Retorna {método: {'santos_not_relegated_prob','n_sims','ci95'}}
+        if self.scorelines or self.elo_k or self.keep_outcomes:
+            raise ValueError("--method all usa resultados H/E/A com probabilidades fixas: sem scorelines, elo_k nem keep_outcomes")
+        tm=self.timer or NULL_TIMER
+        teams,home,away,base,_,k=self._prepare(santos_name)
+        for m in METHODS:
+            self._check_inputs(m)
+        cl=self._clinched(k)
+        if cl is not None:
+            return {m:self._exact_result(cl) for m in METHODS}
+        with tm.phase('probs'):
+            models={m:make_model(m,teams,self.r_elo,self.str_lookup,None,self.league.rho) for m in METHODS}
+            Ps=np.stack([models[m].probs(home,away) for m in METHODS])
+        exs=[self._exact(home,away,base,Pm,k) for Pm in Ps]
+        if all(ex is not None for ex in exs):
+            if not self.compute_only:
+                Path(self.outdir).mkdir(parents=True,exist_ok=True)
+                self._render([j for m,ex in zip(METHODS,exs) for j in self._write_outputs(teams,ex[1],k,m)])
+            return {m:self._exact_result(ex[0]) for m,ex in zip(METHODS,exs)}
+        T=base.size
+        accs=[Accumulator(T,ZONES) for _ in METHODS]
+        timed=self.timer is not None
+        args=((Ps,home,away,base,n,sd,timed,self.blocks) for n,sd in self._shards(n_sims))
+        t0=time.perf_counter()
+        for cs in self._map_shards(simulate_crn_shard,args):
+            for acc,c in zip(accs,cs):
+                acc.update(c)
+            if cs[0].timings:
+                for f,dt in cs[0].timings.items():
+                    tm.add('shard.'+f,dt)
+            if self.progress:
+                dt=time.perf_counter()-t0
+                print(f'[all] {accs[0].n}/{n_sims} simulações ({100*accs[0].n/max(n_sims,1):.1f}%)'
+                      f' — {accs[0].n/max(dt,1e-9):,.0f} sims/s',file=sys.stderr,flush=True)
+        tm.add('simulate',time.perf_counter()-t0)
+        if timed:
+            self.timer.n_sims+=n_sims*len(METHODS)
+
+        if not self.compute_only:
+            Path(self.outdir).mkdir(parents=True,exist_ok=True)
+        out={}; jobs=[]
+        for m,acc in zip(METHODS,accs):
+            safe=int(acc.counts[k,:T-4].sum())
+            lo,hi=wilson_ci(safe,acc.n)
+            if not self.compute_only:
+                jobs+=self._write_outputs(teams,acc,k,m)
+            out[m]={'santos_not_relegated_prob':float(safe/acc.n) if acc.n else 0.0,
+                    'n_sims':int(acc.n),'ci95':(round(float(lo),5),round(float(hi),5))}
+        self._render(jobs)  # figuras dos três métodos num pool só
+        return out
+
+    def rare_event(self,n_sims,team,lo,hi,theta=None):
+        #Probabilidade de 'team' terminar entre lo..hi por amostragem por importância:
+        # os jogos do time são inclinados (θ escolhido por piloto se não informado)
+        # e os resultados reponderados pela razão de verossimilhança.
+        #Retorna dict com prob, se, ci95, ess (tamanho efetivo), theta, hits, n_sims.
+        teams,home,away,base,P,k=self._prepare(team)
+        if self.dynamic:
+            raise ValueError("Amostragem por importância supõe probabilidades fixas por jogo; use sem elo_k")
+        if theta is None:
+            theta=importance.pick_theta(P,home,away,base,self.random_seed,k,lo,hi)
+        res=importance.estimate(P,home,away,base,n_sims,self.random_seed,k,lo,hi,theta,self.shard_size)
+        res['team']=teams[k]; res['positions']=(int(lo),int(hi))
+        return res
+
+    def load_outcomes(self,n_sims,santos_name='Santos'):
+        #Temporadas guardadas por uma execução anterior com keep_outcomes
+        # (outcomes_{method}.npz em outdir), se vieram exatamente desta simulação
+        # (mesma chave de _cache_key e mesmo n_sims): what_if responde sem simular.
+        #Retorna o resumo de run() calculado das posições guardadas, ou None.
+        path=Path(self.outdir)/f'outcomes_{self.method}.npz'
+        if not path.exists():
+            return None
+        teams,home,away,base,P,k=self._prepare(santos_name)
+        store=OutcomeStore.load(path)
+        if store.n_sims!=n_sims or store.key!=self._cache_key(P,home,away,base):
+            return None
+        self.store=store
+        safe=int((store.positions[:,k]<=base.size-4).sum())
+        lo,hi=wilson_ci(safe,n_sims)
+        return {'santos_not_relegated_prob':safe/n_sims,'n_sims':n_sims,
+                'ci95':(round(float(lo),5),round(float(hi),5)),'source':'stored'}
+
+    def what_if(self,fixed,min_samples=2000,resim_sims=None,santos_name='Santos'):
+        #Distribuição de posições condicionada a um cenário {(mandante, visitante): 'H'|'E'|'A'}
+        # (nomes como em remaining_matches). Filtra as temporadas guardadas por
+        # run(..., keep_outcomes=True); se menos de min_samples forem compatíveis
+        # (ou nada foi guardado), re-simula resim_sims temporadas com esses jogos fixados.
+        #Retorna {'matrix': DataFrame times × posições, 'n_sims', 'source': 'stored'|'resimulated'}.
+        fixed={(normalize_name(h),normalize_name(a)):r for (h,a),r in fixed.items()}
+        store=getattr(self,'store',None)
+        if store is not None:
+            counts,n=store.condition(fixed)
+            if n>=min_samples:
+                return {'matrix':position_matrix(store.teams,counts,n),'n_sims':n,'source':'stored'}
+        if getattr(self,'prepared',None) is None:
+            self._prepare(santos_name)
+        teams,home,away,base,P=self.prepared
+        ref=store or OutcomeStore(teams,home,away,np.zeros((0,1),np.uint8),np.zeros((0,len(teams)),np.uint8))
+        Pf=P.copy()
+        for j,c in ref.fixture_codes(fixed).items():
+            Pf[j]=np.eye(3)[c]
+        n=resim_sims or max(min_samples,store.n_sims if store is not None else 0)
+        acc=self._simulate(Pf,home,away,base,n)
+        counts,n=acc.counts,acc.n
+        return {'matrix':position_matrix(teams,counts,n),'n_sims':n,'source':'resimulated'}
+
+    def sweep(self,n_sims,grid,santos_name='Santos'):
+        #Sensibilidade a constantes do modelo: grid = {campo do modelo: [valores]}
+        # (ver sweep.parse_grid; produto cartesiano se houver mais de um campo).
+        # Todos os pontos usam os mesmos uniformes em cada lote (números aleatórios
+        # comuns), numa única passada pelas temporadas; o ponto com os valores
+        # atuais entra sempre e é a referência das diferenças (Dif, com EP pareado).
+        #Salva outputs/sweep_{method}.csv (uma linha por ponto da grade)
+        #Retorna o DataFrame: parâmetros, Atual, Team, Sims, zonas, NaoRebaixado(_SE), Dif(_SE)
+        import pandas as pd
+        teams,home,away,base,P,k=self._prepare(santos_name)
+        if self.dynamic or self.scorelines:
+            raise ValueError("A varredura usa resultados H/E/A com probabilidades fixas: sem elo_k nem scorelines")
+        keys,points=grid_models(self.model,grid)
+        cur=tuple(getattr(self.model,x) for x in keys)
+        vals=[v for v,_ in points]
+        if cur not in vals:
+            points.append((cur,self.model)); vals.append(cur)
+        ref=vals.index(cur)
+        Ps=np.stack([m.probs(home,away) for _,m in points])
+        T,G=base.size,len(points)
+        counts=np.zeros((G,T,T),dtype=np.int64); sq=np.zeros(G)
+        args=((Ps,home,away,base,n,sd,k,ref) for n,sd in self._shards(n_sims))
+        with (self.timer or NULL_TIMER).phase('simulate'):
+            for c,q in self._map_shards(simulate_sweep_shard,args):
+                counts+=c; sq+=q
+        if self.timer is not None:
+            self.timer.n_sims+=n_sims*G
+
+        safe=counts[:,k,:T-4].sum(axis=1)
+        dif=(safe-safe[ref])/n_sims
+        tab=pd.DataFrame(vals,columns=keys)
+        tab['Atual']=np.arange(G)==ref
+        tab['Team']=teams[k]; tab['Sims']=int(n_sims)
+        for z,(lo,hi) in ZONES.items():
+            tab[z]=counts[:,k,lo-1:hi].sum(axis=1)/n_sims
+        tab['NaoRebaixado']=safe/n_sims
+        tab['NaoRebaixado_SE']=binom_se(safe,n_sims)
+        tab['Dif']=dif
+        tab['Dif_SE']=np.sqrt(np.maximum(sq/n_sims-dif*dif,0.0)/n_sims)
+        tab=tab.sort_values(keys,kind='stable').reset_index(drop=True)
+        if not self.compute_only:
+            Path(self.outdir).mkdir(parents=True,exist_ok=True)
+            tab.to_csv(f'{self.outdir}/sweep_{self.method}.csv',index=False)
+        return tab
+
+    def trajectory(self,n_sims,santos_name='Santos'):
+        #Modo trajetória: percorre as rodadas de remaining_matches em ordem e acumula,
+        # numa única passada, o histograma rodada × time × posição (memória
+        # O(rodadas × times × posições), nada guardado por simulação).
+        #Salva:
+        #outputs/trajectory_{method}.csv (Round, Team, Position, Probability)
+        #outputs/trajectory_{method}.png (mapa de calor rodada × posição do time)
+        #(o .png só com charts != 'none'; com compute_only, nenhum dos dois)
+        #Retorna {'rounds': [...], 'santos_not_relegated_by_round': [...]}
+        teams,home,away,base,P,k=self._prepare(santos_name)
+        T=base.size
+        rs=np.unique(self.rounds)
+        args=((P,home,away,base,self.rounds,n,sd,self.dynamic) for n,sd in self._shards(n_sims))
+        hist=np.zeros((rs.size,T,T),dtype=np.int64)
+        with (self.timer or NULL_TIMER).phase('simulate'):
+            for h in self._map_shards(simulate_trajectory_shard,args):
+                hist+=h
+        if self.timer is not None:
+            self.timer.n_sims+=n_sims
+        prob=hist/max(n_sims,1)
+        summary={'rounds':rs.tolist(),
+                 'santos_not_relegated_by_round':[round(float(x),4) for x in prob[:,k,:T-4].sum(axis=1)]}
+        if self.compute_only:
+            return summary
+
+        import pandas as pd
         Path(self.outdir).mkdir(parents=True,exist_ok=True)
+        R,Tm,Pos=np.meshgrid(rs,np.arange(T),np.arange(1,T+1),indexing='ij')
+        pd.DataFrame({'Round':R.ravel(),'Team':np.asarray(teams)[Tm.ravel()],
+                      'Position':Pos.ravel(),'Probability':prob.ravel()}) \
+          .to_csv(f'{self.outdir}/trajectory_{self.method}.csv',index=False)
+        if self.charts=='none':
+            return summary
 
-        t,m,r,s=self._load(); 
-        santos_name_norm= normalize_name(santos_name)
-        
-        rng=np.random.default_rng(self.random_seed)
-        pos=[]
-        not_relegated=0
-        for _ in range(n_sims):
-            fin=self._once(t,m,r,s,rng)
-            mask=(fin["Team"]==santos_name_norm)
-            if not mask.any():
-                disponiveis="', '".join(sorted(fin['Team'].tolist()))
-                raise KeyError(
-                    f"Time '{santos_name}' não encontrado no resultado final da simulação."
-                    f"Verifique a normalização dos nomes. Disponíveis: '{disponiveis}'"
-                )
-            p=int(fin.loc[mask, "Pos"].iloc[0]); 
-            pos.append(p); 
-            not_relegated+=(p<=16)
-        pos=np.array(pos, dtype=int)
-        pr=not_relegated/n_sims
-
-        # --- Figura (histograma) ---
-        fig = plt.figure()
-        plt.hist(pos, bins=np.arange(0.5, 20.6, 1.0))
-        plt.title(f'{santos_name_norm} — {self.method}')
-        fig.savefig(f'{self.outdir}/santos_positions_{self.method}.png', dpi=140)
+        plt=pyplot()
+        fig,ax=plt.subplots(figsize=(8,5))
+        im=ax.imshow(prob[:,k,:].T,aspect='auto',origin='upper',cmap='viridis',
+                     extent=(rs[0]-0.5,rs[-1]+0.5,T+0.5,0.5))
+        ax.set_xticks(rs); ax.set_yticks(np.arange(1,T+1))
+        ax.set_xlabel('Rodada'); ax.set_ylabel('Posição')
+        ax.set_title(f'{teams[k]} — {self.method}')
+        fig.colorbar(im,ax=ax,label='Probabilidade')
+        fig.savefig(f'{self.outdir}/trajectory_{self.method}.png',dpi=140)
         plt.close(fig)
-        
-        #CSV (distribuição de posições)
-        dist=(pd.Series(pos).value_counts().sort_index()
-                .reindex(range(1,21),fill_value=0)
-                .rename_axis('Position').reset_index(name='Count'))
-        dist["Probability"]=dist['Count']/n_sims
-        dist.to_csv(f'{self.outdir}/santos_positions_{self.method}.csv',index=False)    
-
-        return {'santos_not_relegated_prob': float(pr)}
-        
+        return summary
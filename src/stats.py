@@ -0,0 +1,67 @@
+# src/stats.py
+import numpy as np
+
+Z95 = 1.959963984540054
+
+def binom_se(x, n):
+    """
+    Erro-padrão de uma proporção x/n (Agresti–Coull: soma 2 sucessos e 2 fracassos),
+    para que eventos com 0 ou n ocorrências não tenham erro-padrão zero.
+    """
+    x = np.asarray(x, dtype=float)
+    nt = n + 4.0
+    p = (x + 2.0) / nt
+    return np.sqrt(p * (1.0 - p) / nt)
+
+def wilson_ci(x, n, z=Z95):
+    """Intervalo de Wilson (padrão 95%) para a proporção x/n -> (lo, hi)."""
+    x = np.asarray(x, dtype=float)
+    if n <= 0:
+        return np.zeros_like(x), np.ones_like(x)
+    p = x / n
+    den = 1.0 + z*z/n
+    c = (p + z*z/(2*n)) / den
+    h = z*np.sqrt(p*(1 - p)/n + z*z/(4*n*n)) / den
+    return np.clip(c - h, 0.0, 1.0), np.clip(c + h, 0.0, 1.0)
+
+class RunningMoments:
+    """Média e M2 (soma dos quadrados dos desvios) correntes por coluna, mesclando lotes (Chan et al.)."""
+    def __init__(self, size):
+        self.n = 0
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+
+    def merge(self, n, mean, m2):
+        if n <= 0:
+            return
+        tot = self.n + n
+        d = mean - self.mean
+        self.mean = self.mean + d * (n / tot)
+        self.m2 = self.m2 + m2 + d * d * (self.n * n / tot)
+        self.n = tot
+
+    @property
+    def sd(self):
+        return np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.zeros_like(self.m2)
+
+class Accumulator:
+    """
+    Acumuladores de tamanho fixo alimentados lote a lote: contagens times × posições,
+    contadores por zona e média/variância dos pontos finais. A memória não
+    depende do número de simulações.
+    """
+    def __init__(self, T, zones):
+        self.zones = dict(zones)
+        self.counts = np.zeros((T, T), dtype=np.int64)
+        self.zone_counts = np.zeros((T, len(self.zones)), dtype=np.int64)
+        self.points = RunningMoments(T)
+
+    @property
+    def n(self):
+        return self.points.n
+
+    def update(self, chunk):
+        self.counts += chunk.counts
+        for i, (lo, hi) in enumerate(self.zones.values()):
+            self.zone_counts[:, i] += chunk.counts[:, lo - 1:hi].sum(axis=1)
+        self.points.merge(chunk.n, chunk.pts_mean, chunk.pts_m2)
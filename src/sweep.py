@@ -0,0 +1,61 @@
+# src/sweep.py
+import itertools
+import numpy as np
+from dataclasses import fields, replace
+from .engine import outcomes_from_uniforms, season_points, rank_keys, position_counts
+
+# Varredura de sensibilidade com números aleatórios comuns (CRN): em cada lote,
+# os uniformes dos resultados e dos desempates são sorteados uma vez e usados
+# por todos os pontos da grade. As diferenças entre pontos vêm só do parâmetro,
+# e o ponto com os valores atuais reproduz exatamente a simulação normal.
+
+def parse_grid(spec):
+    """
+    "home_adv=0,25,50; gamma=300:500:5" -> {"home_adv": [0.0, 25.0, 50.0], "gamma": [300.0, ..., 500.0]}.
+    Valores separados por vírgula ou lo:hi:n (n pontos igualmente espaçados). Os
+    nomes são os campos do modelo; as constantes (HOME_ADV, MU_HOME, ...) também valem.
+    """
+    grid = {}
+    for item in filter(None, (x.strip() for x in spec.split(";"))):
+        name, vals = (x.strip() for x in item.split("=", 1))
+        if ":" in vals:
+            lo, hi, num = vals.split(":")
+            grid[name.lower()] = np.linspace(float(lo), float(hi), int(num)).tolist()
+        else:
+            grid[name.lower()] = [float(v) for v in vals.split(",") if v.strip()]
+    return grid
+
+def grid_models(model, grid):
+    """(nomes, [(valores, modelo), ...]) do produto cartesiano da grade, via dataclasses.replace."""
+    scalars = {f.name: type(getattr(model, f.name)) for f in fields(model)
+               if not isinstance(getattr(model, f.name), np.ndarray)}
+    bad = sorted(set(grid) - set(scalars))
+    if bad:
+        raise KeyError(f"Parâmetros {bad} não existem em {type(model).__name__}. Disponíveis: {sorted(scalars)}")
+    keys = list(grid)
+    out = []
+    for vals in itertools.product(*(grid[k] for k in keys)):
+        vals = tuple(scalars[k](v) for k, v in zip(keys, vals))
+        out.append((vals, replace(model, **dict(zip(keys, vals)))))
+    return keys, out
+
+def simulate_sweep_shard(Ps, home, away, base, n, seed, team, ref):
+    """
+    Um lote de n temporadas para cada tabela de probabilidades em Ps (grade × jogos × 3),
+    todas com os mesmos uniformes. Devolve (contagens grade × times × posições,
+    Σ (1_g − 1_ref)² de 'team' não rebaixado por ponto), a segunda para o
+    erro-padrão pareado das diferenças em relação ao ponto 'ref'.
+    """
+    rng = np.random.default_rng(seed)
+    G, M, _ = Ps.shape
+    T = base.size
+    u = rng.random((n, M))
+    r = rng.random((n, T))
+    counts = np.empty((G, T, T), dtype=np.int64)
+    safe = np.empty((G, n), dtype=np.int8)
+    for g in range(G):
+        pos = rank_keys(season_points(outcomes_from_uniforms(Ps[g], u), home, away, base) + r)
+        counts[g] = position_counts(pos)
+        safe[g] = pos[:, team] <= T - 4
+    d = safe - safe[ref]
+    return counts, (d * d).sum(axis=1)
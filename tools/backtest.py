@@ -0,0 +1,162 @@
+# tools/backtest.py
+# Backtest de calibração dos métodos. A partir de uma temporada completa de
+# resultados (formato de fit_ratings.py: round,home,away,home_goals,away_goals),
+# monta o snapshot "após a rodada r" para cada r, com a regra de
+# rebuild_remaining.py (jogo disputado se os dois times têm Played >= rodada).
+# Ratings e forças são reajustados só com os jogos já disputados (nada do
+# futuro). Os três métodos são simulados com números aleatórios comuns, e as
+# previsões de posição e de zona são pontuadas contra a classificação final
+# (Brier e log loss). As rodadas são repartidas entre processos, que recebem os
+# dados já carregados uma única vez.
+#   python tools/backtest.py --results data/results.csv --sims 10000 --workers 4
+import argparse, sys, time
+import numpy as np, pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.league import load_league, normalize_name, played_mask
+from src.models import make_model
+from src.engine import HOME_PTS, AWAY_PTS, shard_seeds, simulate_crn_shard
+from src.fit import fit_poisson, replay_elo
+from src.simulator import METHODS, ZONES
+from src import elo
+from tools.fit_ratings import load_results
+
+_DATA = None  # dict com a temporada carregada (um por processo, via _init)
+
+def _init(data):
+    global _DATA
+    _DATA = data
+
+def final_positions(home, away, hg, ag, T):
+    """Posição final (1..T) pelos critérios oficiais: pontos, vitórias, saldo, gols pró."""
+    o = (hg <= ag).astype(np.int8) + (hg < ag)
+    pts = np.bincount(home, HOME_PTS[o], T) + np.bincount(away, AWAY_PTS[o], T)
+    wins = np.bincount(home, hg > ag, T) + np.bincount(away, ag > hg, T)
+    gf = np.bincount(home, hg, T) + np.bincount(away, ag, T)
+    ga = np.bincount(home, ag, T) + np.bincount(away, hg, T)
+    order = np.lexsort((-gf, -(gf - ga), -wins, -pts))
+    pos = np.empty(T, dtype=np.intp)
+    pos[order] = np.arange(1, T + 1)
+    return pos
+
+def snapshot(r, home, away, rounds, hg, ag, T):
+    """
+    Estado após a rodada r: (máscara dos jogos disputados, pontos). Played de cada
+    time = jogos dele com rodada <= r; o jogo conta se os dois times têm Played >= rodada.
+    """
+    upto = rounds <= r
+    played = np.bincount(home[upto], minlength=T) + np.bincount(away[upto], minlength=T)
+    done = played_mask(home, away, rounds, played)
+    h, a, x, y = home[done], away[done], hg[done], ag[done]
+    o = (x <= y).astype(np.int8) + (x < y)
+    return done, (np.bincount(h, HOME_PTS[o], T) + np.bincount(a, AWAY_PTS[o], T)).astype(np.int32)
+
+def round_forecast(r):
+    """Contagens (métodos × times × posições) das simulações a partir do snapshot da rodada r."""
+    d = _DATA
+    teams, home, away, rounds, hg, ag = d["teams"], d["home"], d["away"], d["rounds"], d["hg"], d["ag"]
+    T = len(teams)
+    done, base = snapshot(r, home, away, rounds, hg, ag, T)
+    if d["fixed"] is not None:
+        r_elo, str_lookup, rho = d["fixed"]
+    else:
+        h, a, x, y = home[done], away[done], hg[done], ag[done]
+        attack, defense, rho = fit_poisson(h, a, x, y, T, reg=d["reg"], dixon_coles=d["dixon_coles"])
+        R = replay_elo(h, a, x, y, rounds[done], T, d["init"], d["k"])
+        r_elo = dict(zip(teams, R.tolist()))
+        str_lookup = {t: (float(at), float(df)) for t, at, df in zip(teams, attack, defense)}
+    rh, ra = home[~done], away[~done]
+    Ps = np.stack([make_model(m, teams, r_elo, str_lookup, None, rho).probs(rh, ra) for m in METHODS])
+    counts = np.zeros((len(METHODS), T, T), dtype=np.int64)
+    n_sims, size = d["sims"], d["shard_size"]
+    for k, i0 in enumerate(range(0, n_sims, size)):
+        for c, chunk in zip(counts, simulate_crn_shard(Ps, rh, ra, base, min(size, n_sims - i0),
+                                                       shard_seeds(d["seed"], k, k + 1)[0])):
+            c += chunk.counts
+    return r, int((~done).sum()), counts
+
+def scores(prob, actual, eps=1e-4):
+    """
+    Brier e log loss das previsões de posição (multiclasse, por time) e de zona
+    (binárias, time × zona), contra as posições finais 'actual' (1..T).
+    """
+    T = prob.shape[0]
+    y = np.eye(T)[actual - 1]
+    p_act = prob[np.arange(T), actual - 1]
+    pz = np.stack([prob[:, lo - 1:hi].sum(axis=1) for lo, hi in ZONES.values()], axis=1)
+    yz = np.stack([(actual >= lo) & (actual <= hi) for lo, hi in ZONES.values()], axis=1).astype(float)
+    pzc = np.clip(pz, eps, 1 - eps)
+    return {
+        "pos_brier": float(((prob - y) ** 2).sum(axis=1).mean()),
+        "pos_logloss": float(-np.log(np.maximum(p_act, eps)).mean()),
+        "zone_brier": float(((pz - yz) ** 2).mean()),
+        "zone_logloss": float(-(yz * np.log(pzc) + (1 - yz) * np.log(1 - pzc)).mean()),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--results", default="data/results.csv")
+    ap.add_argument("--sims", type=int, default=10000, help="simulações por rodada (todos os métodos)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--shard-size", type=int, default=10000)
+    ap.add_argument("--workers", type=int, default=1, help="processos (rodadas em paralelo)")
+    ap.add_argument("--rounds", default=None, help="rodadas 'a:b' (inclusivo); padrão: 0 até a penúltima")
+    ap.add_argument("--k", type=float, default=elo.K_FACTOR, help="fator K do replay de Elo")
+    ap.add_argument("--init", default=None, help="CSV Team,Elo com os ratings do início da temporada")
+    ap.add_argument("--reg", type=float, default=1.0,
+                    help="penalidade ridge nas log-forças (maior que em fit_ratings: no começo há poucos jogos)")
+    ap.add_argument("--dixon-coles", action="store_true")
+    ap.add_argument("--fixed", action="store_true",
+                    help="usa data/team_ratings.csv e team_strengths.csv em todas as rodadas, em vez de reajustar "
+                         "(olha o futuro se foram ajustados com a temporada inteira)")
+    ap.add_argument("--outdir", default="outputs")
+    a = ap.parse_args()
+
+    teams, home, away, hg, ag, rounds = load_results(a.results)
+    T = len(teams)
+    init = None
+    if a.init:
+        df = pd.read_csv(a.init, encoding="utf-8-sig")
+        lut = {t: float(e) for t, e in zip(df["Team"].map(normalize_name), df["Elo"])}
+        init = np.array([lut.get(t, elo.DEFAULT_ELO) for t in teams])
+    fixed = None
+    if a.fixed:
+        lg = load_league()
+        fixed = (lg.r_elo, lg.str_lookup, lg.rho)
+    data = dict(teams=teams, home=home, away=away, rounds=rounds, hg=hg, ag=ag, sims=a.sims, seed=a.seed,
+                shard_size=a.shard_size, k=a.k, init=init, reg=a.reg, dixon_coles=a.dixon_coles, fixed=fixed)
+    actual = final_positions(home, away, hg, ag, T)
+    if a.rounds:
+        lo, hi = (int(x) for x in a.rounds.split(":"))
+    else:
+        lo, hi = 0, int(rounds.max()) - 1
+    rs = list(range(lo, hi + 1))
+
+    t0 = time.perf_counter()
+    if a.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=a.workers, initializer=_init, initargs=(data,)) as ex:
+            out = list(ex.map(round_forecast, rs))
+    else:
+        _init(data)
+        out = [round_forecast(r) for r in rs]
+    dt = time.perf_counter() - t0
+
+    rows = []
+    for r, left, counts in out:
+        for m, c in zip(METHODS, counts):
+            rows.append({"round": r, "remaining": left, "method": m, **scores(c / a.sims, actual)})
+    res = pd.DataFrame(rows)
+    summary = res.groupby("method", sort=False)[["pos_brier", "pos_logloss", "zone_brier", "zone_logloss"]].mean()
+
+    Path(a.outdir).mkdir(parents=True, exist_ok=True)
+    res.to_csv(Path(a.outdir) / "backtest.csv", index=False)
+    summary.to_csv(Path(a.outdir) / "backtest_summary.csv")
+    print(f"{len(rs)} rodadas × {len(METHODS)} métodos × {a.sims} simulações em {dt:.1f} s")
+    print("\nMédia por método (menor é melhor):\n")
+    print(summary.to_string(float_format=lambda x: f"{x:.4f}"))
+    print(f"\nGerados: {Path(a.outdir) / 'backtest.csv'}, {Path(a.outdir) / 'backtest_summary.csv'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# tools/bench/bench.py
+# Suíte de benchmark do SeasonSimulator.
+#   python tools/bench/bench.py run --out bench.json
+#   python tools/bench/bench.py compare bench_base.json bench.json --threshold 0.15
+#   python tools/bench/bench.py startup --target 0.5
+#   python tools/bench/bench.py blocks
+#   python tools/bench/bench.py exact
+#   python tools/bench/bench.py clinch
+import argparse, itertools, json, platform, subprocess, sys, tempfile, time
+from pathlib import Path
+import numpy as np, pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tools"))
+
+from src.simulator import SeasonSimulator
+from src.engine import sample_outcomes, season_points, rank_positions, rank_keys, chunk_summary
+from src.stats import Accumulator
+from src.exact import solve, exact_table
+from src.clinch import best_position, worst_position, position_bounds, magic_numbers, ranking_blocks
+from make_fixtures_from_teams import berger_schedule
+
+METHODS = ["baseline", "elo", "poisson"]
+
+def synthetic_league(folder, n_teams, seed=0):
+    """
+    Liga sintética com n_teams times na metade do campeonato (returno inteiro
+    restante), gravada nos mesmos CSVs que main.py usa.
+    """
+    rng = np.random.default_rng(seed)
+    folder = Path(folder); folder.mkdir(parents=True, exist_ok=True)
+    teams = [f"Time {i:03d}" for i in range(1, n_teams + 1)]
+    half = n_teams - 1
+    played = np.full(n_teams, half)
+    pts = rng.integers(half // 2, 2 * half + 1, size=n_teams)
+    pd.DataFrame({"Team": teams, "Points": pts, "Played": played}).to_csv(folder / "current_table.csv", index=False)
+    fx = pd.DataFrame(berger_schedule(teams), columns=["round", "home", "away"])
+    fx[fx["round"] > half].to_csv(folder / "remaining_matches.csv", index=False)
+    pd.DataFrame({"Team": teams, "Elo": np.round(rng.normal(1500, 60, n_teams))}).to_csv(folder / "team_ratings.csv", index=False)
+    pd.DataFrame({"Team": teams, "attack": np.round(rng.normal(1.0, 0.12, n_teams), 3),
+                  "defense": np.round(rng.normal(1.0, 0.12, n_teams), 3)}).to_csv(folder / "team_strengths.csv", index=False)
+    return teams[0]
+
+def endgame_league(folder, n_teams=20, left=2, gap=None, size=3, seed=0):
+    """
+    Como synthetic_league, mas faltando 'left' rodadas, com os times em grupos de
+    'size' (1 ponto entre vizinhos) separados por 'gap' pontos (padrão 3*left + 3):
+    com gap > 3*left, as garantias de src/clinch.py fecham a faixa de posições
+    de cada grupo.
+    """
+    gap = 3 * left + 3 if gap is None else gap
+    team = synthetic_league(folder, n_teams, seed)
+    folder = Path(folder)
+    rounds = 2 * (n_teams - 1)
+    tab = pd.read_csv(folder / "current_table.csv")
+    i = np.arange(n_teams)
+    tab["Points"] = 100 - gap * (i // size) - i % size
+    tab["Played"] = rounds - left
+    tab.to_csv(folder / "current_table.csv", index=False)
+    fx = pd.DataFrame(berger_schedule(list(tab["Team"])), columns=["round", "home", "away"])
+    fx[fx["round"] > rounds - left].to_csv(folder / "remaining_matches.csv", index=False)
+    return team
+
+def tiny_league(rng, max_teams, max_games):
+    """
+    Liga pequena ao acaso para conferência por força bruta: 3 a max_teams times,
+    1 a max_games jogos entre pares sorteados (repetições valem), pontos próximos
+    (muitos empates) e probabilidades H/E/A de uma Dirichlet -> (P, home, away, base).
+    """
+    T = int(rng.integers(3, max_teams + 1))
+    m = int(rng.integers(1, max_games + 1))
+    home = rng.integers(0, T, m)
+    away = (home + rng.integers(1, T, m)) % T
+    base = rng.integers(0, 2 * m + 1, T).astype(np.int64)
+    return rng.dirichlet(np.ones(3), m), home, away, base
+
+def brute_force(P, home, away, base):
+    """
+    Todas as 3^jogos combinações de resultados -> (pontos finais (3^m × T), pesos),
+    para conferir src/exact.py e src/clinch.py em ligas pequenas.
+    """
+    o = np.array(list(itertools.product(range(3), repeat=home.size)))
+    w = P[np.arange(home.size), o].prod(axis=1)
+    return season_points(o, home, away, base), w
+
+def _positions(pts, w, k):
+    # distribuição da posição de k com desempate por sorteio (uniforme entre os empatados)
+    T = pts.shape[1]
+    gt = (pts > pts[:, k:k + 1]).sum(axis=1)
+    eq = (pts == pts[:, k:k + 1]).sum(axis=1) - 1
+    pos = np.zeros(T)
+    for d in range(T):
+        m = eq >= d
+        np.add.at(pos, gt[m] + d, w[m] / (eq[m] + 1))
+    return pos
+
+def _best(fn, repeat):
+    """Menor tempo (s) de 'repeat' execuções e o último resultado."""
+    best, out = np.inf, None
+    for _ in range(repeat):
+        t = time.perf_counter(); out = fn(); best = min(best, time.perf_counter() - t)
+    return best, out
+
+def bench_case(folder, team, method, n_sims, repeat, shard_size=10000):
+    """
+    Tempos por fase para um (liga, método, n_sims). Sorteio, pontos e ranking são
+    medidos num lote (até shard_size temporadas); 'total_s' é a simulação inteira.
+    """
+    outdir = Path(folder) / "out"
+    sim = SeasonSimulator(method, str(Path(folder) / "current_table.csv"), str(Path(folder) / "remaining_matches.csv"),
+                          str(Path(folder) / "team_ratings.csv"), str(Path(folder) / "team_strengths.csv"),
+                          str(outdir), 42, shard_size=shard_size)
+    outdir.mkdir(parents=True, exist_ok=True)
+    nb = min(n_sims, shard_size)
+    r = {"method": method, "teams": None, "matches": None, "sims": n_sims, "block": nb}
+
+    r["load_s"], (teams, idx, home, away, base) = _best(sim._league, repeat)
+    r["teams"], r["matches"] = len(teams), int(home.size)
+    r["probs_s"], P = _best(lambda: sim._model(teams).probs(home, away), repeat)
+
+    rng = np.random.default_rng(0)
+    r["sample_s"], o = _best(lambda: sample_outcomes(P, nb, rng), repeat)
+    r["points_s"], pts = _best(lambda: season_points(o, home, away, base), repeat)
+    r["rank_s"], pos = _best(lambda: rank_positions(pts, rng), repeat)
+    acc = Accumulator(len(teams), {"Rebaixamento": (len(teams) - 3, len(teams))})
+    acc.update(chunk_summary(pts, pos))
+    r["output_s"], _ = _best(lambda: sim._write_outputs(teams, acc, idx[team]), repeat)
+
+    sim._prepare(team)
+    r["total_s"], _ = _best(lambda: sim._simulate(P, home, away, base, n_sims), repeat)
+    r["sims_per_s"] = n_sims / r["total_s"] if r["total_s"] > 0 else float("inf")
+    return r
+
+def cmd_run(a):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_teams in a.teams:
+            folder = Path(tmp) / f"liga_{n_teams}"
+            team = synthetic_league(folder, n_teams)
+            for method in a.methods:
+                for n in a.sims:
+                    r = bench_case(folder, team, method, n, a.repeat, a.shard_size)
+                    results.append(r)
+                    print(f"{method:8s} times={r['teams']:3d} sims={n:7d}  load={r['load_s']*1e3:7.1f}ms"
+                          f"  probs={r['probs_s']*1e3:6.2f}ms  sample={r['sample_s']*1e3:7.1f}ms"
+                          f"  points={r['points_s']*1e3:7.1f}ms  rank={r['rank_s']*1e3:7.1f}ms"
+                          f"  output={r['output_s']*1e3:6.1f}ms  {r['sims_per_s']:,.0f} sims/s", flush=True)
+    doc = {"meta": {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                    "machine": platform.machine(), "platform": platform.platform(),
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+           "results": results}
+    Path(a.out).write_text(json.dumps(doc, indent=1), encoding="utf-8")
+    print(f"Gerado: {a.out}")
+
+def cmd_compare(a):
+    key = lambda r: (r["method"], r["teams"], r["sims"])
+    base = {key(r): r for r in json.loads(Path(a.baseline).read_text(encoding="utf-8"))["results"]}
+    cur = json.loads(Path(a.current).read_text(encoding="utf-8"))["results"]
+    bad = 0
+    for r in cur:
+        b = base.get(key(r))
+        if b is None:
+            continue
+        ratio = r["sims_per_s"] / b["sims_per_s"]
+        flag = ratio < 1.0 - a.threshold
+        bad += flag
+        print(f"{'REGRESSÃO' if flag else 'ok':9s} {r['method']:8s} times={r['teams']:3d} sims={r['sims']:7d}"
+              f"  {b['sims_per_s']:,.0f} -> {r['sims_per_s']:,.0f} sims/s ({100*(ratio-1):+.1f}%)")
+    print(f"\n{bad} regressão(ões) acima de {100*a.threshold:.0f}%")
+    raise SystemExit(1 if bad else 0)
+
+def cmd_startup(a):
+    # tempo de partida a frio de main.py no modo só-cálculo (processo novo a cada vez);
+    # a primeira execução (aquecimento) gera o snapshot e não entra na conta
+    cmd = [sys.executable, str(ROOT / "main.py"), "--method", a.method, "--sims", str(a.sims), "--no-plot"]
+    subprocess.run(cmd, cwd=ROOT, check=True, capture_output=True)
+    ts = []
+    for _ in range(a.repeat):
+        t = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, check=True, capture_output=True)
+        ts.append(time.perf_counter() - t)
+    med = float(np.median(ts))
+    ok = med <= a.target
+    print(f"{'ok' if ok else 'LENTO':5s} partida a frio (mediana de {a.repeat}): {med*1e3:.0f} ms"
+          f"  (mín {min(ts)*1e3:.0f} ms, alvo {a.target*1e3:.0f} ms)")
+    raise SystemExit(0 if ok else 1)
+
+def cmd_blocks(a):
+    # confere que a ordenação por blocos (src/clinch.py + engine.rank_keys) entra
+    # no Monte Carlo da reta final com as opções padrão (aqui: Elo dinâmico, que
+    # não usa a solução exata) e que dá as mesmas contagens da ordenação completa
+    with tempfile.TemporaryDirectory() as tmp:
+        team = endgame_league(tmp, a.teams, a.left)
+        sim = SeasonSimulator("elo", f"{tmp}/current_table.csv", f"{tmp}/remaining_matches.csv",
+                              f"{tmp}/team_ratings.csv", f"{tmp}/team_strengths.csv", tmp, 42,
+                              compute_only=True, elo_k=20.0)
+        teams, home, away, base, P, k = sim._prepare(team)
+        blocks = sim.blocks
+        if blocks is None:
+            print("FALHA ordenação por blocos não entrou no Monte Carlo")
+            raise SystemExit(1)
+        t_blk, acc_b = _best(lambda: sim._simulate(P, home, away, base, a.sims), a.repeat)
+        sim.blocks = None
+        t_full, acc_f = _best(lambda: sim._simulate(P, home, away, base, a.sims), a.repeat)
+        same = bool((acc_b.counts == acc_f.counts).all())
+        key = base + np.random.default_rng(0).random((min(a.sims, sim.shard_size), base.size))
+        r_blk, _ = _best(lambda: rank_keys(key, blocks), a.repeat)
+        r_full, _ = _best(lambda: rank_keys(key), a.repeat)
+    print(f"{home.size} jogos restantes, blocos {[int(i.size) for i, _ in blocks]}")
+    print(f"ranking por lote: {r_full*1e3:.1f} -> {r_blk*1e3:.1f} ms;"
+          f"  simulação: {t_full*1e3:.0f} -> {t_blk*1e3:.0f} ms")
+    print(f"{'ok' if same else 'FALHA'} contagens {'idênticas' if same else 'diferentes'} às da ordenação completa")
+    raise SystemExit(0 if same else 1)
+
+def cmd_exact(a):
+    # confere src/exact.py (solve com e sem faixas, exact_table) contra a
+    # enumeração completa dos resultados em ligas pequenas sorteadas
+    rng = np.random.default_rng(a.seed)
+    worst_err, bad = 0.0, None
+    for i in range(a.leagues):
+        P, home, away, base = tiny_league(rng, a.max_teams, a.max_games)
+        T = base.size
+        pts, w = brute_force(P, home, away, base)
+        ref = np.array([_positions(pts, w, k) for k in range(T)])
+        tab = exact_table(P, home, away, base)
+        edges = np.array([0, int(rng.integers(1, T)), T])
+        err = float(np.abs(tab.counts - ref).max())
+        for k in range(T):
+            r = solve(P, home, away, base, k, edges)
+            cum = np.r_[0.0, np.cumsum(ref[k])]
+            err = max(err, float(np.abs(r.bands - np.diff(cum[edges])).max()))
+        worst_err = max(worst_err, err)
+        if err > a.tol and bad is None:
+            bad = (i, T, home.size, err)
+    print(f"{a.leagues} ligas de até {a.max_teams} times e {a.max_games} jogos (seed {a.seed});"
+          f" maior diferença para a força bruta: {worst_err:.1e}")
+    if bad is not None:
+        print(f"FALHA liga {bad[0]} ({bad[1]} times, {bad[2]} jogos): diferença {bad[3]:.1e} > {a.tol:.0e}")
+        raise SystemExit(1)
+    print("ok solve e exact_table iguais à enumeração completa")
+
+def _clinch_errors(home, away, base, pts, safe_pos):
+    # violações das garantias de src/clinch.py diante de todos os resultados
+    # possíveis (empates contam a favor na melhor posição e contra na pior)
+    T = base.size
+    gt = (pts[:, :, None] < pts[:, None, :]).sum(axis=2)   # (n, T): times com mais pontos
+    ge = (pts[:, :, None] <= pts[:, None, :]).sum(axis=2)  # idem, contando k e os empatados
+    best, worst = position_bounds(base, home, away)
+    errs = [f"time {k}: melhor {best[k]} > {1 + gt[:, k].min()}" for k in range(T) if best[k] > 1 + gt[:, k].min()]
+    errs += [f"time {k}: pior {worst[k]} < {ge[:, k].max()}" for k in range(T) if worst[k] < ge[:, k].max()]
+    for k in range(T):
+        for pk in np.unique(pts[:, k]):
+            m = pts[:, k] == pk
+            if best_position(base, home, away, k, pk) > 1 + gt[m, k].min():
+                errs.append(f"time {k} com {pk} pontos: melhor posição acima da real")
+            if worst_position(base, home, away, k, pk) < ge[m, k].max():
+                errs.append(f"time {k} com {pk} pontos: pior posição abaixo da real")
+        safe, doomed = magic_numbers(base, home, away, k, safe_pos)
+        gain = pts[:, k] - base[k]
+        if safe is not None and (ge[gain >= safe, k] > safe_pos).any():
+            errs.append(f"time {k}: {safe} pontos não garantem a posição {safe_pos}")
+        if doomed is not None and (1 + gt[gain <= doomed, k] <= safe_pos).any():
+            errs.append(f"time {k}: com {doomed} pontos ainda alcança a posição {safe_pos}")
+    for idx, off in ranking_blocks(worst, max_pairs=T * T):
+        if idx.size and (1 + gt[:, idx].min() <= off or ge[:, idx].max() > off + idx.size):
+            errs.append(f"bloco {idx.tolist()} (a partir de {off + 1}): posições fora do bloco")
+    return errs, int((best == 1 + gt.min(axis=0)).sum() + (worst == ge.max(axis=0)).sum())
+
+def cmd_clinch(a):
+    # confere as garantias de src/clinch.py (melhor/pior posição, com e sem pontos
+    # fixados, números mágicos e blocos de ranking_blocks) contra todos os
+    # resultados possíveis em ligas pequenas sorteadas
+    rng = np.random.default_rng(a.seed)
+    n_bounds = tight = 0
+    for i in range(a.leagues):
+        P, home, away, base = tiny_league(rng, a.max_teams, a.max_games)
+        pts, _ = brute_force(P, home, away, base)
+        errs, t = _clinch_errors(home, away, base, pts, int(rng.integers(1, base.size)))
+        n_bounds += 2 * base.size
+        tight += t
+        if errs:
+            print(f"FALHA liga {i} ({base.size} times, {home.size} jogos): " + "; ".join(errs[:5]))
+            raise SystemExit(1)
+    print(f"{a.leagues} ligas de até {a.max_teams} times e {a.max_games} jogos (seed {a.seed});"
+          f" {100 * tight / n_bounds:.1f}% das melhores/piores posições iguais às reais")
+    print("ok garantias válidas diante de todos os resultados possíveis")
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="executa a matriz de benchmarks e grava JSON")
+    r.add_argument("--methods", nargs="+", default=METHODS, choices=METHODS)
+    r.add_argument("--sims", nargs="+", type=int, default=[1000, 10000, 50000])
+    r.add_argument("--teams", nargs="+", type=int, default=[20, 30, 40])
+    r.add_argument("--shard-size", type=int, default=10000)
+    r.add_argument("--repeat", type=int, default=3)
+    r.add_argument("--out", default="bench.json")
+    c = sub.add_parser("compare", help="compara com um JSON de referência (sims/s)")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument("--threshold", type=float, default=0.15, help="queda relativa máxima tolerada em sims/s")
+    s = sub.add_parser("startup", help="mede a partida a frio de main.py --no-plot contra um alvo")
+    s.add_argument("--target", type=float, default=0.5, help="tempo máximo (s) da mediana")
+    s.add_argument("--method", default="elo", choices=METHODS)
+    s.add_argument("--sims", type=int, default=1000)
+    s.add_argument("--repeat", type=int, default=7)
+    b = sub.add_parser("blocks", help="confere a ordenação por blocos da reta final contra a completa")
+    b.add_argument("--teams", type=int, default=20)
+    b.add_argument("--left", type=int, default=2, help="rodadas restantes")
+    b.add_argument("--sims", type=int, default=50000)
+    b.add_argument("--repeat", type=int, default=3)
+    e = sub.add_parser("exact", help="confere a solução exata (src/exact.py) por força bruta em ligas pequenas")
+    e.add_argument("--leagues", type=int, default=300)
+    e.add_argument("--max-teams", type=int, default=6)
+    e.add_argument("--max-games", type=int, default=8)
+    e.add_argument("--seed", type=int, default=0)
+    e.add_argument("--tol", type=float, default=1e-9)
+    g = sub.add_parser("clinch", help="confere as garantias (src/clinch.py) por força bruta em ligas pequenas")
+    g.add_argument("--leagues", type=int, default=300)
+    g.add_argument("--max-teams", type=int, default=6)
+    g.add_argument("--max-games", type=int, default=8)
+    g.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args()
+    {"run": cmd_run, "compare": cmd_compare, "startup": cmd_startup, "blocks": cmd_blocks,
+     "exact": cmd_exact, "clinch": cmd_clinch}[a.cmd](a)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 # tools/check_consistency.py
-import pandas as pd
-from collections import Counter
+import sys
+import numpy as np, pandas as pd
+from pathlib import Path
 
-TABLE = "data/current_table.csv"
-REMAINING = "data/remaining_matches.csv"  # colunas: round,home,away
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.league import TABLE, REMAINING, read_table, read_fixtures
+
+# Lê os CSVs sem a validação de load_league(): um nome fora do padrão em
+# remaining_matches é justamente o que esta checagem deve apontar, não um erro.
 
 TEAMS_2025 = {
  "Flamengo","Cruzeiro","Palmeiras","Mirassol","Botafogo","Bahia","São Paulo",
@@ -11,45 +15,23 @@ TEAMS_2025 = {
  "Atlético Mineiro","Grêmio","Vasco da Gama","Santos","Vitória","Juventude",
  "Fortaleza","Sport"
 }
-NAME_FIX = {
-    "Atlético": "Atlético Mineiro",
-    "Bragantino": "Red Bull Bragantino",
-    "Sao Paulo": "São Paulo",
-    "Gremio": "Grêmio",
-    "Atletico Mineiro": "Atlético Mineiro",
-    "RB Bragantino": "Red Bull Bragantino",
-}
-
-def load_table(path):
-    df = pd.read_csv(path)
-    df.columns = [c.strip() for c in df.columns]
-    assert {"Team","Points","Played"}.issubset(df.columns), f"Colunas esperadas: Team, Points, Played. Obtido: {df.columns.tolist()}"
-    df["Team"] = df["Team"].map(lambda x: NAME_FIX.get(str(x).strip(), str(x).strip()))
-    assert len(df)==20, f"Devem ser 20 times; encontrei {len(df)}"
-    assert df["Team"].is_unique, "Times repetidos em current_table.csv"
-    df["Points"] = pd.to_numeric(df["Points"], errors="raise").astype(int)
-    df["Played"] = pd.to_numeric(df["Played"], errors="raise").astype(int)
-    return df[["Team","Points","Played"]]
-
-def load_remaining(path):
-    df = pd.read_csv(path)
-    df.columns = [c.strip().lower() for c in df.columns]
-    assert {"round","home","away"}.issubset(df.columns), f"Colunas esperadas: round, home, away. Obtido: {df.columns.tolist()}"
-    for col in ["home","away"]:
-        df[col] = df[col].map(lambda x: NAME_FIX.get(str(x).strip(), str(x).strip()))
-    df["round"] = pd.to_numeric(df["round"], errors="raise").astype(int)
-    return df[["round","home","away"]]
-
 def main():
-    table = load_table(TABLE)
-    remaining = load_remaining(REMAINING)
+    table = read_table(TABLE)
+    if "Played" not in table.columns:
+        raise SystemExit(f"{TABLE}: falta a coluna Played")
+    teams = table["Team"].tolist()
+    played = pd.to_numeric(table["Played"], errors="raise").to_numpy(dtype=int)
+    T = len(teams)
+    if T != 20:
+        print(f"⚠️ Devem ser 20 times; encontrei {T}")
+    remaining = read_fixtures(REMAINING)
 
-    rounds_fully_completed = int(table["Played"].min())
-    round_in_progress = rounds_fully_completed + 1 if table["Played"].max() > rounds_fully_completed else None
+    rounds_fully_completed = int(played.min())
+    round_in_progress = rounds_fully_completed + 1 if played.max() > rounds_fully_completed else None
     print(f"Rodadas completamente concluídas: {rounds_fully_completed}")
     print(f"Rodada em andamento: {round_in_progress if round_in_progress else 'nenhuma'}")
 
-    names = set(table["Team"])
+    names = set(teams)
     faltam = TEAMS_2025 - names
     extras = names - TEAMS_2025
     if faltam: print("⚠️ Faltando na tabela:", sorted(faltam))
@@ -57,34 +39,29 @@ def main():
     if not faltam and not extras:
         print("✅ Participantes batem com a Série A 2025.")
 
-    expected_remaining = {t: 38 - int(p) for t,p in table.set_index("Team")["Played"].items()}
-    c = Counter()
-    for _, row in remaining.iterrows():
-        c[row["home"]] += 1
-        c[row["away"]] += 1
-    remaining_count = dict(c)
+    unknown = sorted((set(remaining["home"]) | set(remaining["away"])) - names)
+    if unknown:
+        print("\n⚠️ Times em remaining_matches.csv fora de current_table.csv:", unknown)
 
-    diffs = []
-    for t in sorted(names):
-        exp = expected_remaining.get(t, None)
-        got = remaining_count.get(t, 0)
-        if exp != got:
-            diffs.append((t, exp, got))
+    got = pd.concat([remaining["home"], remaining["away"]]).value_counts()
+    expected = dict(zip(teams, 38 - played))
+    diffs = [(t, int(expected[t]), int(got.get(t, 0))) for t in sorted(names) if expected[t] != got.get(t, 0)]
     if diffs:
         print("\n⚠️ Diferenças entre '38 - Played' e jogos em remaining_matches.csv:")
-        for t, exp, got in diffs:
-            print(f" - {t}: esperado {exp}, arquivo tem {got}")
-    else:
+        for t, exp, n in diffs:
+            print(f" - {t}: esperado {exp}, arquivo tem {n}")
+    elif not unknown:
         print("\n✅ remaining_matches.csv consistente com current_table.csv para todos os times.")
 
-    if not remaining.empty:
-        rounds_list = sorted(remaining["round"].unique())
-        print(f"\nRodadas ainda listadas em remaining_matches: {rounds_list}")
-        round_sizes = remaining.groupby("round").size()
-        bad = round_sizes[round_sizes != 10]
-        if not bad.empty:
-            print("⚠️ Rodadas com quantidade ≠ 10 jogos (pode haver adiamentos):")
-            print(bad.to_string())
+    if not remaining.empty and "round" in remaining.columns:
+        rounds = pd.to_numeric(remaining["round"], errors="coerce").fillna(0).to_numpy(dtype=int)
+        rounds_list, sizes = np.unique(rounds, return_counts=True)
+        print(f"\nRodadas ainda listadas em remaining_matches: {rounds_list.tolist()}")
+        bad = sizes != T // 2
+        if bad.any():
+            print(f"⚠️ Rodadas com quantidade ≠ {T // 2} jogos (pode haver adiamentos):")
+            for r, n in zip(rounds_list[bad], sizes[bad]):
+                print(f"{r:>5d} {n:>4d}")
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,22 @@
 # tools/compare_models.py
-import pandas as pd, numpy as np
+import argparse, sys, pandas as pd, numpy as np
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.simulator import read_matrix
+from src.league import normalize_name
+
 METHODS = ["baseline","elo","poisson"]
-OUTDIR = Path("outputs")
 
-def read_dist(method):
-    df = pd.read_csv(OUTDIR / f"santos_positions_{method}.csv")
-    df = df.set_index("Position")["Probability"].reindex(range(1,21), fill_value=0.0)
+def read_dist(outdir, method, team):
+    # linha do time na matriz times × posições gerada por main.py (CSV ou parquet)
+    mat = read_matrix(outdir, method)
+    team = normalize_name(team)
+    if team not in mat.index:
+        raise KeyError(f"Time '{team}' não encontrado em positions_matrix_{method}")
+    T = len(mat)
+    df = mat.loc[team, [str(p) for p in range(1, T+1)]].astype(float)
+    df.index = range(1, T+1)
     return df
 
 def summarize(df):
@@ -20,25 +29,50 @@ def summarize(df):
         "Top-4":                float(prob[:4].sum()),
         "Top-6":                float(prob[:6].sum()),
         "Top-10":               float(prob[:10].sum()),
-        "Não rebaixado (1–16)": float(prob[:16].sum()),
-        "Rebaixado (17–20)":    float(prob[16:].sum()),
+        "Não rebaixado (1–16)": float(prob[:-4].sum()),
+        "Rebaixado (17–20)":    float(prob[-4:].sum()),
         "Posição média":        pos_mean,
         "Mediana":              med,
     }
 
-rows = []
-for m in METHODS:
+def compare_table(outdir="outputs", team="Santos", methods=METHODS):
+    """
+    Resumo do time por método (uma linha por matriz encontrada em outdir).
+    FileNotFoundError se não houver matriz de nenhum método; KeyError se o time
+    (normalizado, ver normalize_name) não estiver na matriz.
+    """
+    rows = []
+    for m in methods:
+        try:
+            df = read_dist(outdir, m, team)
+            rows.append(pd.Series(summarize(df), name=m))
+        except FileNotFoundError:
+            pass
+    if not rows:
+        raise FileNotFoundError(f"Nenhuma positions_matrix_{{{','.join(methods)}}} em {outdir}")
+    return pd.DataFrame(rows)
+
+def format_table(res, team):
+    res = res.copy()
+    cols_pct = ["Título (1º)","Top-4","Top-6","Top-10","Não rebaixado (1–16)","Rebaixado (17–20)"]
+    for c in cols_pct:
+        if c in res:
+            res[c] = (100*res[c]).round(2).astype(str) + "%"
+    return f"\nComparativo — {team} (modelos)\n\n" + res.to_string(float_format=lambda x: f"{x:.2f}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--team", default="Santos")
+    ap.add_argument("--outdir", default="outputs")
+    args = ap.parse_args()
+    team = normalize_name(args.team)
     try:
-        df = read_dist(m)
-        rows.append(pd.Series(summarize(df), name=m))
-    except FileNotFoundError:
-        pass
-
-res = pd.DataFrame(rows)
-cols_pct = ["Título (1º)","Top-4","Top-6","Top-10","Não rebaixado (1–16)","Rebaixado (17–20)"]
-for c in cols_pct:
-    if c in res:
-        res[c] = (100*res[c]).round(2).astype(str) + "%"
-
-print("\nComparativo — Santos (modelos)\n")
-print(res.to_string(float_format=lambda x: f"{x:.2f}"))
+        res = compare_table(args.outdir, team)
+    except FileNotFoundError as e:
+        raise SystemExit(str(e))
+    except KeyError as e:
+        raise SystemExit(e.args[0])
+    print(format_table(res, team))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# tools/fit_ratings.py
+# Ajusta data/team_ratings.csv (Elo) e data/team_strengths.csv (Poisson) a partir
+# dos jogos disputados (mesmo formato de fixtures_38r.csv + gols):
+#   round,home,away,home_goals,away_goals
+#   python tools/fit_ratings.py --results data/results.csv [--dixon-coles] [--k 20]
+import argparse, sys, time
+import numpy as np, pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.league import read_fixtures, normalize_name
+from src.fit import fit_poisson, replay_elo
+from src import elo
+
+def load_results(path):
+    df = read_fixtures(path)
+    missing = {"home_goals", "away_goals"} - set(df.columns)
+    assert not missing, f"Faltam as colunas {sorted(missing)} em {path}"
+    df = df.dropna(subset=["home_goals", "away_goals"])
+    teams = pd.unique(pd.concat([df["home"], df["away"]])).tolist()
+    idx = {t: i for i, t in enumerate(teams)}
+    rounds = pd.to_numeric(df["round"], errors="coerce").fillna(0).to_numpy(dtype=np.int32) \
+        if "round" in df.columns else np.zeros(len(df), dtype=np.int32)
+    return (teams, df["home"].map(idx).to_numpy(dtype=np.intp), df["away"].map(idx).to_numpy(dtype=np.intp),
+            df["home_goals"].to_numpy(dtype=np.int64), df["away_goals"].to_numpy(dtype=np.int64), rounds)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--results", default="data/results.csv")
+    ap.add_argument("--ratings-out", default="data/team_ratings.csv")
+    ap.add_argument("--strengths-out", default="data/team_strengths.csv")
+    ap.add_argument("--k", type=float, default=elo.K_FACTOR, help="fator K do replay de Elo")
+    ap.add_argument("--init", default=None, help="CSV Team,Elo com os ratings iniciais (padrão: todos em DEFAULT_ELO)")
+    ap.add_argument("--dixon-coles", action="store_true", help="estima também o ρ de Dixon–Coles (coluna rho)")
+    ap.add_argument("--reg", type=float, default=1e-3, help="penalidade ridge nas log-forças")
+    a = ap.parse_args()
+
+    teams, home, away, hg, ag, rounds = load_results(a.results)
+    T = len(teams)
+    t0 = time.perf_counter()
+    attack, defense, rho = fit_poisson(home, away, hg, ag, T, reg=a.reg, dixon_coles=a.dixon_coles)
+    init = None
+    if a.init:
+        df = pd.read_csv(a.init, encoding="utf-8-sig")
+        lut = {normalize_name(t): float(e) for t, e in zip(df["Team"], df["Elo"])}
+        init = np.array([lut.get(t, elo.DEFAULT_ELO) for t in teams])
+    R = replay_elo(home, away, hg, ag, rounds, T, init, a.k)
+    dt = time.perf_counter() - t0
+
+    pd.DataFrame({"Team": teams, "Elo": np.round(R, 1)}).to_csv(a.ratings_out, index=False)
+    st = pd.DataFrame({"Team": teams, "attack": np.round(attack, 4), "defense": np.round(defense, 4)})
+    if a.dixon_coles:
+        st["rho"] = round(rho, 4)
+    st.to_csv(a.strengths_out, index=False)
+    print(f"{len(hg)} jogos, {T} times ajustados em {dt*1e3:.1f} ms"
+          + (f" (ρ Dixon–Coles = {rho:+.4f})" if a.dixon_coles else ""))
+    print(f"Gerados: {a.ratings_out}, {a.strengths_out}")
+
+if __name__ == "__main__":
+    main()
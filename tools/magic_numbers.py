@@ -0,0 +1,65 @@
+# tools/magic_numbers.py
+# Garantias matemáticas da tabela atual, sem simular (src/clinch.py): melhor e
+# pior posição possíveis de cada time e os "números mágicos" da zona de
+# rebaixamento — quantos pontos, nos jogos que faltam, garantem ficar fora dela
+# e até quantos pontos a queda é certa.
+#   python tools/magic_numbers.py
+#   python tools/magic_numbers.py --team Santos --out outputs/magic_numbers.csv
+import argparse, sys, time
+import numpy as np, pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.league import load_league, normalize_name
+from src.clinch import position_bounds, magic_numbers
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--table", default="data/current_table.csv")
+    ap.add_argument("--remaining", default="data/remaining_matches.csv")
+    ap.add_argument("--team", default=None, help="só este time")
+    ap.add_argument("--out", default=None, help="CSV de saída (opcional)")
+    a = ap.parse_args()
+
+    lg = load_league(a.table, a.remaining)
+    T = len(lg.teams)
+    safe_pos = T - 4
+    base, home, away = lg.points, lg.home, lg.away
+    left = np.bincount(home, minlength=T) + np.bincount(away, minlength=T)
+    ks = range(T)
+    if a.team:
+        name = normalize_name(a.team)
+        if name not in lg.index:
+            raise SystemExit(f"Time '{a.team}' não encontrado em {a.table}")
+        ks = [lg.index[name]]
+
+    t0 = time.perf_counter()
+    best, worst = position_bounds(base, home, away)
+    rows = []
+    for k in ks:
+        safe, doomed = magic_numbers(base, home, away, k, safe_pos)
+        if worst[k] <= safe_pos:
+            zone = "salvo"
+        elif best[k] > safe_pos:
+            zone = "rebaixado"
+        else:
+            zone = ""
+        rows.append({"Team": lg.teams[k], "Points": int(base[k]), "Left": int(left[k]),
+                     "Max": int(base[k] + 3 * left[k]), "BestPos": int(best[k]), "WorstPos": int(worst[k]),
+                     "Zone": zone,
+                     "SafeWith": "" if safe is None else int(safe),
+                     "DoomedUpTo": "" if doomed is None else int(doomed)})
+    dt = time.perf_counter() - t0
+    df = pd.DataFrame(rows).sort_values(["Points", "Team"], ascending=[False, True])
+
+    print(f"{T} times, {home.size} jogos restantes, rebaixamento a partir da posição {safe_pos + 1} ({dt:.2f} s)")
+    print("SafeWith: pontos nos jogos restantes que garantem terminar entre 1 e "
+          f"{safe_pos}; DoomedUpTo: com até esses pontos, a queda é certa.\n")
+    print(df.to_string(index=False))
+    if a.out:
+        Path(a.out).parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(a.out, index=False, encoding="utf-8-sig")
+        print(f"\nGerado: {a.out}")
+
+if __name__ == "__main__":
+    main()
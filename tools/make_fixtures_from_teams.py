@@ -1,24 +1,18 @@
 # tools/make_fixtures_from_teams.py
+import sys
 import pandas as pd
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.league import read_table
+
 TABLE = "data/current_table.csv"
 OUT   = "data/fixtures_38r.csv"
 
-NAME_FIX = {
-    "Atlético": "Atlético Mineiro",
-    "Bragantino": "Red Bull Bragantino",
-    "Sao Paulo": "São Paulo",
-    "Gremio": "Grêmio",
-    "Atletico Mineiro": "Atlético Mineiro",
-    "RB Bragantino": "Red Bull Bragantino",
-}
-
-def load_teams(path):
-    df = pd.read_csv(path)
-    assert "Team" in df.columns, "Falta a coluna 'Team' em data/current_table.csv"
-    teams = [NAME_FIX.get(str(t).strip(), str(t).strip()) for t in df["Team"].tolist()]
-    assert len(teams)==20 and len(set(teams))==20, "Devem ser 20 times distintos."
+def load_teams(path=TABLE):
+    # só a tabela: o calendário gerado aqui não pode depender de remaining_matches.csv
+    teams = read_table(path)["Team"].tolist()
+    assert len(teams)==20, "Devem ser 20 times distintos."
     return teams
 
 def berger_schedule(teams):
@@ -1,31 +1,44 @@
 # tools/quick_summary.py
-import argparse, pandas as pd, numpy as np
+import argparse, sys, numpy as np
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.simulator import read_matrix
+from src.league import normalize_name
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--method", required=True, choices=["baseline","elo","poisson"])
+    ap.add_argument("--team", default="Santos")
     ap.add_argument("--outdir", default="outputs")
     args = ap.parse_args()
+    team = normalize_name(args.team)
 
-    path = Path(args.outdir) / f"santos_positions_{args.method}.csv"
-    df = pd.read_csv(path)  # colunas: Position, Count, Probability
+    try:
+        mat = read_matrix(args.outdir, args.method)  # colunas: Sims, 1..20, zonas (CSV ou parquet)
+    except FileNotFoundError as e:
+        raise SystemExit(str(e))
+    if team not in mat.index:
+        raise SystemExit(f"Time '{args.team}' não encontrado em positions_matrix_{args.method}")
 
-    # reconstrói amostra virtual para métricas simples
-    positions = np.repeat(df["Position"].to_numpy(), df["Count"].to_numpy())
-    N = positions.size
+    # métricas direto da distribuição de posições do time
+    row = mat.loc[team]
+    T = len(mat)
+    idx = np.arange(1, T+1)
+    prob = row[[str(p) for p in idx]].to_numpy(dtype=float)
+    N = int(row["Sims"])
 
     metrics = {
-        "Título (1º)":          (positions == 1).mean(),
-        "Top-4":                (positions <= 4).mean(),
-        "Top-6":                (positions <= 6).mean(),
-        "Top-10":               (positions <= 10).mean(),
-        "Não rebaixado (1–16)": (positions <= 16).mean(),
-        "Rebaixado (17–20)":    (positions >= 17).mean(),
-        "Posição média":        positions.mean(),
-        "Mediana":              float(np.median(positions)),
+        "Título (1º)":          prob[0],
+        "Top-4":                prob[:4].sum(),
+        "Top-6":                prob[:6].sum(),
+        "Top-10":               prob[:10].sum(),
+        "Não rebaixado (1–16)": prob[:-4].sum(),
+        "Rebaixado (17–20)":    prob[-4:].sum(),
+        "Posição média":        float(idx @ prob),
+        "Mediana":              float(idx[np.searchsorted(prob.cumsum(), 0.5)]),
     }
-    print(f"Método: {args.method} | Simulações: {N}")
+    print(f"Método: {args.method} | Time: {team} | Simulações: {N}")
     for k,v in metrics.items():
         print(f"{k}: {v:.4f}" if "posição" in k.lower() else f"{k}: {100*v:.2f}%")
 
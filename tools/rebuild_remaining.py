@@ -1,46 +1,28 @@
 # tools/rebuild_remaining.py
+import sys
 import pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.league import read_table, read_fixtures, played_mask
 
 TABLE = "data/current_table.csv"
 FIXTURES_ALL = "data/fixtures_38r.csv"      # calendário completo com 38 rodadas
 OUT = "data/remaining_matches_atualizado.csv"
 
-NAME_FIX = {
-    "Atlético": "Atlético Mineiro",
-    "Bragantino": "Red Bull Bragantino",
-    "Sao Paulo": "São Paulo",
-    "Gremio": "Grêmio",
-    "Atletico Mineiro": "Atlético Mineiro",
-    "RB Bragantino": "Red Bull Bragantino",
-}
-
-def load_table(path):
-    df = pd.read_csv(path)
-    df.columns = [c.strip() for c in df.columns]
-    assert {"Team","Points","Played"}.issubset(df.columns), f"Colunas esperadas: Team, Points, Played. Obtido: {df.columns.tolist()}"
-    df["Team"] = df["Team"].map(lambda x: NAME_FIX.get(str(x).strip(), str(x).strip()))
-    df["Points"] = pd.to_numeric(df["Points"], errors="raise").astype(int)
-    df["Played"] = pd.to_numeric(df["Played"], errors="raise").astype(int)
-    return df.set_index("Team")[["Played"]]
-
-def load_fixtures(path):
-    df = pd.read_csv(path)
-    df.columns = [c.strip().lower() for c in df.columns]
-    assert {"round","home","away"}.issubset(df.columns), "Esperado: round, home, away"
-    for col in ["home","away"]:
-        df[col] = df[col].map(lambda x: NAME_FIX.get(str(x).strip(), str(x).strip()))
-    df["round"] = pd.to_numeric(df["round"], errors="raise").astype(int)
-    return df[["round","home","away"]]
-
-table = load_table(TABLE)
-fix = load_fixtures(FIXTURES_ALL)
+# só a tabela: remaining_matches.csv é o que este script regenera, não precisa estar válido
+table = read_table(TABLE).set_index("Team")
+table["Played"] = pd.to_numeric(table["Played"], errors="raise").astype(int)
+index = {t: i for i, t in enumerate(table.index)}
+fix = read_fixtures(FIXTURES_ALL)
+fix["round"] = pd.to_numeric(fix["round"], errors="raise").astype(int)
+fix = fix[["round","home","away"]]
+fix = fix[fix["home"].isin(index) & fix["away"].isin(index)]
 
 # Um jogo da rodada r foi disputado se (Played_home >= r) e (Played_away >= r)
-fix = fix.merge(table, left_on="home", right_index=True).rename(columns={"Played":"played_home"})
-fix = fix.merge(table, left_on="away", right_index=True).rename(columns={"Played":"played_away"})
-
-played_mask = (fix["played_home"] >= fix["round"]) & (fix["played_away"] >= fix["round"])
-remaining = fix.loc[~played_mask, ["round","home","away"]].sort_values(["round","home","away"]).reset_index(drop=True)
+done = played_mask(fix["home"].map(index).to_numpy(), fix["away"].map(index).to_numpy(),
+                   fix["round"].to_numpy(), table["Played"].to_numpy())
+remaining = fix.loc[~done, ["round","home","away"]].sort_values(["round","home","away"]).reset_index(drop=True)
 
 remaining.to_csv(OUT, index=False, encoding="utf-8-sig")
 print(f"Arquivo gerado: {OUT}  (linhas: {len(remaining)})")